@@ -0,0 +1,193 @@
+# %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+# Author: Markus Ritschel
+# eMail:  git@markusritschel.de
+# Date:   2026-10-19
+# %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+#
+"""Vectorised block bootstrap along the time dimension.
+
+The resampling indices of all resamples are drawn once as an integer matrix of shape
+(resamples, time) by the moving-block scheme, which keeps the autocorrelation within
+blocks. All grid cells, models and input arrays share the same matrix, so that spatial
+and inter-model dependencies are preserved. The resamples are then evaluated in batches:
+
+- for the named statistics ``"mean"``, ``"var"`` and ``"std"``, the resample counts of
+  each time step are multiplied with the data, centred per cell, in a single matrix
+  product per batch;
+- any other statistic is applied to a batched gather of shape (..., batch, time).
+
+Dask-backed data are processed in parallel over the chunks of the other dimensions. The
+memory of the intermediate arrays grows with `batch_size`, not with the number of
+resamples.
+"""
+import logging
+
+import numpy as np
+import xarray as xr
+
+from .precision import promote, valid
+
+log = logging.getLogger(__name__)
+
+__all__ = ["block_bootstrap_indices", "bootstrap", "bootstrap_interval"]
+
+COUNT_STATISTICS = ("mean", "var", "std")
+
+
+def block_bootstrap_indices(
+        n: int, n_resamples: int = 1000, block_size: int | None = None,
+        seed: int | np.random.Generator | None = None) -> np.ndarray:
+    """Return the indices of circular moving-block bootstrap resamples.
+
+    Parameters
+    ----------
+    n : int
+        The length of the time series.
+    n_resamples : int
+        The number of resamples.
+    block_size : int, optional
+        The length of the blocks. Defaults to :math:`n^{1/3}` (rounded).
+    seed : int | np.random.Generator, optional
+        The seed of the random number generator.
+
+    Returns
+    -------
+    np.ndarray
+        Array of shape (n_resamples, n).
+
+    Example
+    -------
+    >>> idx = block_bootstrap_indices(10, 2, block_size=5, seed=0)
+    >>> idx.shape, bool(np.all(np.diff(idx[:, :5]) % 10 == 1))
+    ((2, 10), True)
+    """
+    block_size = block_size or max(int(round(n ** (1 / 3))), 1)
+    rng = np.random.default_rng(seed)
+    n_blocks = -(-n // block_size)
+    starts = rng.integers(0, n, size=(n_resamples, n_blocks))
+    indices = (starts[:, :, None] + np.arange(block_size)) % n
+    return indices.reshape(n_resamples, -1)[:, :n]
+
+
+def _counts(indices, n):
+    """Return how often each time step occurs in each resample, shape (resamples, n)."""
+    rows = np.repeat(np.arange(len(indices)), indices.shape[1])
+    counts = np.zeros((len(indices), n))
+    np.add.at(counts, (rows, indices.ravel()), 1)
+    return counts
+
+
+def _centred(x, mask):
+    """Return the data centred on the mean of each cell (zero where not `mask`)."""
+    n = mask.sum(axis=-1, keepdims=True)
+    x = np.where(mask, x, 0.0)
+    centre = np.divide(x.sum(axis=-1, keepdims=True), n, out=np.zeros(n.shape),
+                       where=n > 0)
+    return np.where(mask, x - centre, 0.0), centre
+
+
+def _count_statistic(x, mask, counts, statistic, ddof):
+    """Evaluate a moment statistic for a batch of resamples by matrix products.
+
+    `x` must be centred per cell (see :func:`_centred`), so that the sums of squares do
+    not cancel for data far from zero; the mean is returned relative to the centre.
+    """
+    n = mask.astype(np.float64) @ counts.T
+    mean = np.divide(x @ counts.T, n, out=np.full(n.shape, np.nan), where=n > 0)
+    if statistic == "mean":
+        return mean
+    m2 = (x ** 2) @ counts.T - n * mean ** 2
+    var = np.divide(np.clip(m2, 0, None), n - ddof, out=np.full(n.shape, np.nan),
+                    where=n > ddof)
+    return var if statistic == "var" else np.sqrt(var)
+
+
+def _bootstrap_block(*arrays, indices, statistic, batch_size, ddof):
+    """Evaluate all resamples of a block whose time dimension is the last axis."""
+    if isinstance(statistic, str):
+        mask = arrays[1]
+        x, centre = _centred(arrays[0], mask)
+    results = []
+    for start in range(0, len(indices), batch_size):
+        batch = indices[start:start + batch_size]
+        if isinstance(statistic, str):
+            counts = _counts(batch, x.shape[-1])
+            results.append(_count_statistic(x, mask, counts, statistic, ddof))
+        else:
+            results.append(statistic(*(x[..., batch] for x in arrays), axis=-1))
+    result = np.concatenate(results, axis=-1)
+    return result + centre if statistic == "mean" else result
+
+
+def bootstrap(*arrays: xr.DataArray, statistic="mean", dim: str = "time",
+              n_resamples: int = 1000, block_size: int | None = None,
+              indices: np.ndarray | None = None, batch_size: int = 100, ddof: int = 1,
+              seed: int | None = None) -> xr.DataArray:
+    """Return the bootstrap distribution of a statistic along `dim`.
+
+    Parameters
+    ----------
+    *arrays : xr.DataArray
+        The (dask-backed) data. Several arrays (e.g. models and observations) are
+        resampled jointly with the same indices.
+    statistic : str | callable
+        ``"mean"``, ``"var"`` or ``"std"`` (single array only), or a function
+        ``statistic(*arrays, axis)`` reducing the numpy arrays along `axis`, e.g.
+        ``lambda m, o, axis: np.sqrt(np.nanmean((m - o) ** 2, axis=axis))``.
+    dim : str
+        The dimension to be resampled.
+    n_resamples, block_size, seed
+        See :func:`block_bootstrap_indices`.
+    indices : np.ndarray, optional
+        Precomputed resampling indices of shape (resamples, time), e.g. to evaluate
+        several statistics on identical resamples.
+    batch_size : int
+        The number of resamples evaluated at once.
+    ddof : int
+        The delta degrees of freedom of ``"var"`` and ``"std"``.
+
+    Returns
+    -------
+    xr.DataArray
+        The statistic with a new trailing dimension ``resample``.
+    """
+    if isinstance(statistic, str):
+        if statistic not in COUNT_STATISTICS:
+            raise ValueError(f"Unknown statistic '{statistic}'. Choose one of "
+                             f"{COUNT_STATISTICS} or pass a function.")
+        if len(arrays) != 1:
+            raise ValueError("Named statistics take a single array; "
+                             "pass a function instead.")
+    n = arrays[0].sizes[dim]
+    if indices is None:
+        indices = block_bootstrap_indices(n, n_resamples, block_size, seed)
+    log.debug("Bootstrap %d resamples of %d time steps in batches of %d",
+              len(indices), n, batch_size)
+    arrays = [x.chunk({dim: -1}) if x.chunks is not None else x for x in arrays]
+    if isinstance(statistic, str):
+        arrays = [promote(arrays[0]), valid(arrays[0])]
+    else:
+        arrays = [promote(x) for x in arrays]
+    result = xr.apply_ufunc(
+        _bootstrap_block, *arrays,
+        input_core_dims=[[dim]] * len(arrays),
+        output_core_dims=[["resample"]],
+        kwargs={"indices": indices, "statistic": statistic, "batch_size": batch_size,
+                "ddof": ddof},
+        dask="parallelized",
+        output_dtypes=[np.float64],
+        dask_gufunc_kwargs={"output_sizes": {"resample": len(indices)}},
+    )
+    return result.assign_attrs(n_resamples=len(indices), resampled_dim=dim)
+
+
+def bootstrap_interval(samples: xr.DataArray, level: float = 0.9,
+                       dim: str = "resample") -> xr.DataArray:
+    """Return the percentile confidence interval of a bootstrap distribution.
+
+    The result has a dimension ``bound`` with the coordinates ``"lower"`` and
+    ``"upper"``.
+    """
+    alpha = (1 - level) / 2
+    interval = samples.quantile([alpha, 1 - alpha], dim=dim)
+    return interval.rename(quantile="bound").assign_coords(bound=["lower", "upper"])
@@ -1,12 +1,55 @@
 """CLI script for bayes_climsim_eval."""
 
+import contextlib
+from pathlib import Path
+
 import typer
 from rich.console import Console
+from rich.table import Table
 
 app = typer.Typer()
 console = Console()
 
 
+@app.callback()
+def cli(
+    ctx: typer.Context,
+    cluster: bool = typer.Option(None, "--cluster/--no-cluster",
+                                 help="Run computations on a local dask cluster. "
+                                      "Default for `run` and `report`; `scaling` uses "
+                                      "the threaded scheduler unless --cluster is "
+                                      "given."),
+    n_workers: int = typer.Option(None, help="Maximum number of dask workers."),
+    threads_per_worker: int = typer.Option(None, help="Threads per dask worker."),
+    memory_limit: str = typer.Option(None,
+                                     help="Memory limit per dask worker, e.g. 4GB."),
+):
+    """CLI script for bayes_climsim_eval."""
+    ctx.obj = {"enabled": cluster, "n_workers": n_workers,
+               "threads_per_worker": threads_per_worker, "memory_limit": memory_limit}
+
+
+@contextlib.contextmanager
+def dask_cluster(ctx: typer.Context, **defaults):
+    """Run the enclosed computations on the cluster configured via the CLI options.
+
+    The CLI options take precedence over `defaults`. The worker memory is reported
+    before and after.
+    """
+    from .core.cluster import cluster_summary, compute_cluster
+
+    options = dict(ctx.obj or {})
+    enabled = options.pop("enabled", None) is not False
+    options = {**defaults,
+               **{key: value for key, value in options.items() if value is not None}}
+    with compute_cluster(enabled, **options) as client:
+        if client is not None:
+            console.print(cluster_summary(client))
+        yield client
+        if client is not None:
+            console.print(cluster_summary(client))
+
+
 @app.command()
 def main():
     """CLI script for bayes_climsim_eval."""
@@ -27,5 +70,125 @@ def main():
     console.print("See Typer documentation at https://typer.tiangolo.com/")
 
 
+@app.command()
+def run(
+    ctx: typer.Context,
+    config: Path = typer.Argument(..., exists=True,
+                                  help="The TOML pipeline definition."),
+    target: list[str] = typer.Option(None, "--target", "-t",
+                                     help="Run only these stages and their ancestors."),
+    force: list[str] = typer.Option(None, "--force", "-f",
+                                    help="Re-run these stages and their descendants."),
+    workers: int = typer.Option(None, help="Maximum number of concurrent stages."),
+    dry_run: bool = typer.Option(False, "--dry-run",
+                                 help="Only show the execution plan."),
+):
+    """Run (a subgraph of) a declarative evaluation pipeline."""
+    from .pipeline import Pipeline
+
+    pipeline = Pipeline.from_toml(config)
+    plan = pipeline.plan(target, force or ())
+    table = Table(title=f"Pipeline {pipeline.name}")
+    table.add_column("Stage")
+    table.add_column("Uses")
+    table.add_column("Status")
+    for name, status in plan.items():
+        status = "[yellow]run[/yellow]" if status == "run" else "[green]cached[/green]"
+        table.add_row(name, pipeline.stages[name].uses, status)
+    console.print(table)
+    if not dry_run:
+        with dask_cluster(ctx, **pipeline.cluster):
+            pipeline.run(target, force or (), workers=workers)
+        console.print("[green]Pipeline finished.[/green]")
+
+
+@app.command()
+def report(
+    ctx: typer.Context,
+    config: Path = typer.Argument(..., exists=True,
+                                  help="The TOML report definition."),
+    figure: list[str] = typer.Option(None, "--figure",
+                                     help="Build only these figures."),
+    force: bool = typer.Option(False, "--force", "-f",
+                               help="Re-render all selected figures."),
+    workers: int = typer.Option(None, help="Number of processes rendering figures."),
+    book: bool = typer.Option(True, "--book/--no-book",
+                              help="Assemble the Jupyter-Book."),
+    dry_run: bool = typer.Option(False, "--dry-run",
+                                 help="Only show the stale figures."),
+):
+    """Render the stale figures of the report in parallel and build the Jupyter-Book."""
+    from .report import Report
+
+    report = Report.from_toml(config)
+    plan = report.plan(figure, force)
+    table = Table(title=f"Report {report.book}")
+    table.add_column("Figure")
+    table.add_column("File")
+    table.add_column("Status")
+    for name, status in plan.items():
+        status = ("[yellow]render[/yellow]" if status == "render"
+                  else "[green]current[/green]")
+        table.add_row(name, report.figures[name].filename, status)
+    console.print(table)
+    if dry_run:
+        return
+    if "render" in plan.values():
+        # only the pipeline stages use the cluster, figures are rendered without it
+        stages = report.stages(figure, force)
+        if stages and "run" in report.pipeline.plan(stages).values():
+            with dask_cluster(ctx, **report.pipeline.cluster):
+                report.pipeline.run(stages)
+        report.build(figure, force, workers=workers)
+    if book:
+        report.build_book()
+    console.print("[green]Report finished.[/green]")
+
+
+@app.command()
+def scaling(
+    ctx: typer.Context,
+    models: list[int] = typer.Option([5, 10, 20], "--models", help="Ensemble sizes."),
+    resolutions: list[float] = typer.Option([5.0, 2.5], "--resolutions",
+                                            help="Grid resolutions in degrees."),
+    workers: list[int] = typer.Option([1, 2, 4], "--workers",
+                                      help="Numbers of workers."),
+    n_time: int = typer.Option(120, help="Number of monthly time steps."),
+    repeats: int = typer.Option(1,
+                                help="Repetitions per run (the fastest is recorded)."),
+    output_dir: Path = typer.Option(None, help="Directory of the results. "
+                                               "Defaults to PLOT_DIR."),
+    style: str = typer.Option("white_paper",
+                              help="Matplotlib style from assets/mpl_styles."),
+):
+    """Measure strong and weak scaling of the evaluation on synthetic data.
+
+    Runs on the threaded scheduler unless --cluster is given. The global --n-workers
+    caps the numbers of workers; --threads-per-worker and --memory-limit apply to the
+    cluster.
+    """
+    from .scaling import save_scaling_report, scaling_study
+
+    options = ctx.obj or {}
+    if options.get("n_workers"):
+        cap = options["n_workers"]
+        workers = [w for w in workers if w <= cap] or [cap]
+    results = scaling_study(models, resolutions, workers, n_time=n_time,
+                            repeats=repeats, cluster=bool(options.get("enabled")),
+                            threads_per_worker=options.get("threads_per_worker") or 1,
+                            memory_limit=options.get("memory_limit"))
+    table = Table(title="Scaling study")
+    columns = ["kind", "n_models", "resolution", "workers", "seconds",
+               "throughput_mb_s", "peak_memory_mb", "input_mb", "io_mb", "efficiency"]
+    for column in columns:
+        table.add_column(column, justify="left" if column == "kind" else "right")
+    for _, row in results.iterrows():
+        table.add_row(*(f"{row[c]:.3g}" if isinstance(row[c], float) else str(row[c])
+                        for c in columns))
+    console.print(table)
+    paths = save_scaling_report(results, output_dir, style=style)
+    console.print(f"[green]Saved {paths['table']} and {paths['figure']}.[/green]")
+
+
 if __name__ == "__main__":
     app()
@@ -0,0 +1,148 @@
+# %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+# Author: Markus Ritschel
+# eMail:  git@markusritschel.de
+# Date:   2026-10-19
+# %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+#
+"""Local dask-distributed cluster management.
+
+The cluster is sized from the available cores and memory unless configured explicitly,
+e.g. via the ``[cluster]`` table of a pipeline definition or the CLI options. Workers
+spill to ``DATA_DIR/dask-worker-space`` and are scaled adaptively with the number of
+pending tasks.
+
+Example
+-------
+>>> with compute_cluster(n_workers=8) as client:  # doctest: +SKIP
+...     result = pairwise_distances(field).compute()
+"""
+import contextlib
+import logging
+import os
+from pathlib import Path
+
+from dask.utils import format_bytes
+from rich.table import Table
+
+log = logging.getLogger(__name__)
+
+__all__ = ["cluster_config", "start_cluster", "compute_cluster", "cluster_summary"]
+
+
+def _available_cores():
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def cluster_config(n_workers: int | None = None, threads_per_worker: int | None = None,
+                   memory_limit: str | int | None = None,
+                   memory_fraction: float = 0.9) -> dict:
+    """Return the cluster size, derived from the available resources where not given.
+
+    Parameters
+    ----------
+    n_workers : int, optional
+        The maximum number of worker processes.
+    threads_per_worker : int, optional
+        The threads per worker. Defaults to 2 on machines with at least 4 cores, else 1.
+    memory_limit : str | int, optional
+        The memory limit per worker (e.g. ``"4GB"``). Defaults to `memory_fraction` of
+        the total memory, divided among the workers.
+    memory_fraction : float
+        The fraction of the total memory available to the cluster.
+    """
+    import psutil
+
+    cores = _available_cores()
+    threads_per_worker = threads_per_worker or (2 if cores >= 4 else 1)
+    n_workers = n_workers or max(cores // threads_per_worker, 1)
+    if memory_limit is None:
+        memory_limit = int(memory_fraction * psutil.virtual_memory().total / n_workers)
+    return {"n_workers": n_workers, "threads_per_worker": threads_per_worker,
+            "memory_limit": memory_limit}
+
+
+def start_cluster(n_workers: int | None = None, threads_per_worker: int | None = None,
+                  memory_limit: str | int | None = None, adaptive: bool = True,
+                  minimum: int = 1, spill_dir: str | Path | None = None,
+                  dashboard_address: str = ":8787", processes: bool = True):
+    """Start a :class:`distributed.LocalCluster` and return a client connected to it.
+
+    Parameters
+    ----------
+    n_workers, threads_per_worker, memory_limit
+        See :func:`cluster_config`. With `adaptive`, `n_workers` is the maximum.
+    adaptive : bool
+        Scale the number of workers between `minimum` and `n_workers` with the load.
+    minimum : int
+        The minimum number of workers of an adaptive cluster.
+    spill_dir : str | Path, optional
+        Directory for spilled data. Defaults to ``DATA_DIR/dask-worker-space``.
+    dashboard_address : str
+        The address of the dashboard. Use ``":0"`` for a random free port.
+    processes : bool
+        Whether to use worker processes (recommended) or threads.
+
+    Returns
+    -------
+    distributed.Client
+        The client. Close both, ``client`` and ``client.cluster``, when done (or use
+        :func:`compute_cluster`).
+    """
+    from distributed import Client, LocalCluster
+
+    if spill_dir is None:
+        from .. import DATA_DIR
+        spill_dir = DATA_DIR / "dask-worker-space"
+    spill_dir = Path(spill_dir)
+    spill_dir.mkdir(parents=True, exist_ok=True)
+
+    config = cluster_config(n_workers, threads_per_worker, memory_limit)
+    n_workers = min(minimum, config["n_workers"]) if adaptive else config["n_workers"]
+    cluster = LocalCluster(
+        n_workers=n_workers,
+        threads_per_worker=config["threads_per_worker"],
+        memory_limit=config["memory_limit"],
+        local_directory=str(spill_dir),
+        dashboard_address=dashboard_address,
+        processes=processes,
+    )
+    if adaptive:
+        cluster.adapt(minimum=minimum, maximum=config["n_workers"])
+    client = Client(cluster)
+    log.info("Started dask cluster with up to %d workers x %d threads, dashboard at %s",
+             config["n_workers"], config["threads_per_worker"], client.dashboard_link)
+    return client
+
+
+@contextlib.contextmanager
+def compute_cluster(enabled: bool = True, **kwargs):
+    """Context manager running a local cluster; yields None if not `enabled`."""
+    if not enabled:
+        yield None
+        return
+    client = start_cluster(**kwargs)
+    try:
+        yield client
+    finally:
+        cluster = client.cluster
+        client.close()
+        cluster.close()
+
+
+def cluster_summary(client) -> Table:
+    """Return a rich table with the dashboard address and the memory of all workers."""
+    info = client.scheduler_info()
+    table = Table(title=f"Dask cluster — dashboard: {client.dashboard_link}")
+    for column in ("Worker", "Threads", "Memory", "Limit", "Spilled"):
+        table.add_column(column, justify="left" if column == "Worker" else "right")
+    for address, worker in sorted(info["workers"].items()):
+        memory = worker.get("metrics", {}).get("memory", 0)
+        spilled = worker.get("metrics", {}).get("spilled_bytes", {}).get("disk", 0)
+        table.add_row(address, str(worker.get("nthreads", "")),
+                      format_bytes(memory),
+                      format_bytes(worker.get("memory_limit", 0)),
+                      format_bytes(spilled))
+    return table
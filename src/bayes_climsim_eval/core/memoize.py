@@ -0,0 +1,181 @@
+# %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+# Author: Markus Ritschel
+# eMail:  git@markusritschel.de
+# Date:   2026-10-19
+# %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+#
+"""Memoization of (expensive) function results on disk.
+
+Results are pickled into a size-bounded cache directory, keyed on the source code of the
+function and its arguments. Arguments are hashed with :func:`dask.base.tokenize`, which
+handles NumPy, pandas and xarray objects (including dask-backed ones) deterministically.
+The least recently used entries are evicted once the cache exceeds its maximum size,
+which can be set via the environment variable ``MEMOIZE_MAX_SIZE`` (in bytes).
+
+Example
+-------
+>>> @memoize  # doctest: +SKIP
+... def preprocess(path, season="DJF"):
+...     ...
+"""
+import contextlib
+import functools
+import inspect
+import logging
+import os
+import pickle
+import threading
+from pathlib import Path
+
+import dask
+from dask.base import tokenize
+
+log = logging.getLogger(__name__)
+
+__all__ = ["DiskCache", "memoize", "source_hash"]
+
+DEFAULT_MAX_SIZE = 10 * 2**30
+_MISSING = object()
+
+
+class DiskCache:
+    """A size-bounded key-value store of pickled objects with LRU eviction.
+
+    Parameters
+    ----------
+    directory : str | Path, optional
+        The cache directory. Defaults to ``DATA_DIR/cache/memoize``.
+    max_size : int, optional
+        The maximum total size in bytes. Defaults to ``MEMOIZE_MAX_SIZE`` or 10 GiB.
+    """
+
+    def __init__(self, directory: str | Path | None = None,
+                 max_size: int | None = None):
+        if directory is None:
+            from .. import DATA_DIR
+            directory = DATA_DIR / "cache" / "memoize"
+        self.directory = Path(directory)
+        self.max_size = int(max_size or os.getenv("MEMOIZE_MAX_SIZE", DEFAULT_MAX_SIZE))
+
+    def path(self, key: str) -> Path:
+        """Return the path of the cache file of `key`."""
+        return self.directory / f"{key}.pkl"
+
+    def __contains__(self, key: str) -> bool:
+        """Return whether `key` is cached."""
+        return self.path(key).exists()
+
+    def get(self, key: str, default=None):
+        """Return the cached object, or `default` if absent."""
+        path = self.path(key)
+        try:
+            with open(path, "rb") as f:
+                value = pickle.load(f)
+        except FileNotFoundError:
+            return default
+        # mark as recently used for the eviction (unless evicted concurrently meanwhile)
+        with contextlib.suppress(FileNotFoundError):
+            os.utime(path)
+        return value
+
+    def set(self, key: str, value):
+        """Store an object and return it.
+
+        Lazy (dask-backed) objects are computed beforehand. Raises a ValueError if the
+        object does not fit into the cache.
+        """
+        (value,) = dask.compute(value)
+        path = self.path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp, "wb") as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        size = tmp.stat().st_size
+        if size > self.max_size:
+            tmp.unlink()
+            raise ValueError(f"Cannot cache '{key}': its size of {size} bytes exceeds "
+                             f"the maximum cache size of {self.max_size} bytes.")
+        os.replace(tmp, path)
+        self.evict()
+        return value
+
+    def _stats(self) -> list[tuple[Path, os.stat_result]]:
+        """Return all cache files with their stats, the least recently used first.
+
+        Files removed by concurrent writers between listing and stat are skipped.
+        """
+        if not self.directory.exists():
+            return []
+        stats = []
+        for path in self.directory.glob("*.pkl"):
+            with contextlib.suppress(FileNotFoundError):
+                stats.append((path, path.stat()))
+        return sorted(stats, key=lambda item: item[1].st_mtime)
+
+    def entries(self) -> list[Path]:
+        """Return all cache files, the least recently used first."""
+        return [path for path, _ in self._stats()]
+
+    def size(self) -> int:
+        """Return the total size of the cache files in bytes."""
+        return sum(stat.st_size for _, stat in self._stats())
+
+    def evict(self):
+        """Delete the least recently used entries until the cache fits `max_size`."""
+        stats = self._stats()
+        total = sum(stat.st_size for _, stat in stats)
+        for path, stat in stats:
+            if total <= self.max_size:
+                break
+            total -= stat.st_size
+            path.unlink(missing_ok=True)
+            log.debug("Evicted %s from cache", path.name)
+
+    def clear(self):
+        """Delete all entries."""
+        for path in self.entries():
+            path.unlink(missing_ok=True)
+
+
+def source_hash(func) -> str:
+    """Return a hash of the source code of `func` (or of its byte code or repr)."""
+    try:
+        source = inspect.getsource(func)
+    except (OSError, TypeError):
+        code = getattr(func, "__code__", None)
+        source = (code.co_code, code.co_consts) if code is not None else repr(func)
+    return tokenize(source)
+
+
+def memoize(func=None, *, cache: DiskCache | None = None):
+    """Cache the results of `func` on disk.
+
+    The cache key comprises the module, name and source code of the function as well as
+    all arguments. Changing the function body therefore invalidates its cached results.
+    Call ``func.uncached(...)`` to bypass the cache.
+
+    Parameters
+    ----------
+    cache : DiskCache, optional
+        The cache to use. Defaults to a :class:`DiskCache` in
+        ``DATA_DIR/cache/memoize``.
+    """
+    if func is None:
+        return functools.partial(memoize, cache=cache)
+    cache = cache or DiskCache()
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        bound = inspect.signature(func).bind(*args, **kwargs)
+        bound.apply_defaults()
+        key = tokenize(func.__module__, func.__qualname__, source_hash(func),
+                       bound.args, bound.kwargs)
+        result = cache.get(key, _MISSING)
+        if result is not _MISSING:
+            log.info("Load cached result of %s (%s)", func.__qualname__, key)
+            return result
+        return cache.set(key, func(*args, **kwargs))
+
+    wrapper.uncached = func
+    wrapper.cache = cache
+    return wrapper
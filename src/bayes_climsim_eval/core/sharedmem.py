@@ -0,0 +1,171 @@
+# %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+# Author: Markus Ritschel
+# eMail:  git@markusritschel.de
+# Date:   2026-10-19
+# %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+#
+"""Share read-only datasets (observations, cell areas, region masks) between processes.
+
+The data are copied once into :mod:`multiprocessing.shared_memory` blocks (or
+memory-mapped ``.npy`` files, e.g. on a shared file system) and workers attach to them
+without copying. The returned handle is small and picklable, so it can be passed to the
+workers, e.g. via the ``initializer`` of a
+:class:`concurrent.futures.ProcessPoolExecutor`::
+
+    with SharedDataset(obs) as shared:
+        with ProcessPoolExecutor(64, initializer=init_worker,
+                                 initargs=(shared.handle,)) as pool:
+            pool.map(evaluate_model, models)
+
+    def evaluate_model(model):
+        obs = shared_dataset()
+        ...
+"""
+import logging
+import shutil
+import sys
+import tempfile
+import uuid
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+from pathlib import Path
+
+import dask.array
+import numpy as np
+import xarray as xr
+
+log = logging.getLogger(__name__)
+
+__all__ = ["SharedDataset", "attach_dataset", "init_worker", "shared_dataset"]
+
+BACKENDS = ("shm", "memmap")
+
+# keeps the attached shared memory blocks of this process alive
+_ATTACHED = {}
+_WORKER_DATASET = None
+
+
+@dataclass(frozen=True)
+class SharedArrayHandle:
+    """Everything needed to attach to a shared array from another process."""
+
+    name: str
+    shape: tuple
+    dtype: str
+    backend: str = "shm"
+
+
+def _allocate(shape, dtype, backend, directory):
+    """Allocate a writable shared array and return it together with its handle."""
+    dtype = np.dtype(dtype)
+    if backend == "shm":
+        size = max(int(np.prod(shape)) * dtype.itemsize, 1)
+        block = shared_memory.SharedMemory(create=True, size=size)
+        array = np.ndarray(shape, dtype=dtype, buffer=block.buf)
+        handle = SharedArrayHandle(block.name, tuple(shape), dtype.str, backend)
+        return block, array, handle
+    path = Path(directory) / f"{uuid.uuid4().hex}.npy"
+    array = np.lib.format.open_memmap(path, mode="w+", dtype=dtype, shape=tuple(shape))
+    return None, array, SharedArrayHandle(str(path), tuple(shape), dtype.str, backend)
+
+
+def attach_array(handle: SharedArrayHandle) -> np.ndarray:
+    """Return a read-only, zero-copy view of a shared array."""
+    if handle.backend == "memmap":
+        return np.load(handle.name, mmap_mode="r")
+    block = _ATTACHED.get(handle.name)
+    if block is None:
+        kwargs = {"track": False} if sys.version_info >= (3, 13) else {}
+        block = shared_memory.SharedMemory(name=handle.name, **kwargs)
+        _ATTACHED[handle.name] = block
+    array = np.ndarray(handle.shape, dtype=np.dtype(handle.dtype), buffer=block.buf)
+    array.flags.writeable = False
+    return array
+
+
+class SharedDataset:
+    """Copy a dataset once into shared memory for zero-copy access from other processes.
+
+    All variables (data variables and coordinates) are shared. Dask-backed variables are
+    written chunk by chunk, so the dataset is never held twice in memory. The owner must
+    keep the instance alive (or use it as context manager) while workers are running.
+
+    Parameters
+    ----------
+    ds : xr.Dataset
+        The dataset, e.g. the observations merged with cell areas and region masks.
+    backend : str
+        Either ``"shm"`` (POSIX shared memory) or ``"memmap"`` (memory-mapped ``.npy``
+        files in `directory`, which may reside on a shared file system).
+    directory : str | Path, optional
+        The directory of the memory-mapped files. Defaults to a temporary directory.
+    """
+
+    def __init__(self, ds: xr.Dataset, backend: str = "shm",
+                 directory: str | Path | None = None):
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown backend '{backend}'. Choose one of {BACKENDS}.")
+        self.backend = backend
+        self._blocks = []
+        self._directory = None
+        if backend == "memmap":
+            self._directory = Path(tempfile.mkdtemp(prefix="shared_", dir=directory))
+
+        variables = {}
+        for name, var in ds.variables.items():
+            if var.dtype.hasobject:
+                self.close()
+                raise TypeError(f"Variable '{name}' of object dtype cannot be shared.")
+            block, array, handle = _allocate(var.shape, var.dtype, backend,
+                                             self._directory)
+            if block is not None:
+                self._blocks.append(block)
+            if isinstance(var.data, dask.array.Array):
+                dask.array.store(var.data, array, lock=False)
+            else:
+                np.copyto(array, var.values)
+            variables[name] = (var.dims, dict(var.attrs), handle)
+        self.handle = {"variables": variables, "coords": list(ds.coords),
+                       "attrs": dict(ds.attrs)}
+        log.info("Shared %d variables (%.1f MB) via %s", len(variables),
+                 ds.nbytes / 1e6, backend)
+
+    def close(self):
+        """Release the shared data. Attached workers must not access it afterwards."""
+        for block in self._blocks:
+            block.close()
+            block.unlink()
+        self._blocks = []
+        if self._directory is not None:
+            shutil.rmtree(self._directory, ignore_errors=True)
+            self._directory = None
+
+    def __enter__(self):
+        """Return the shared dataset itself."""
+        return self
+
+    def __exit__(self, *exc):
+        """Release the shared data, see :meth:`close`."""
+        self.close()
+
+
+def attach_dataset(handle: dict) -> xr.Dataset:
+    """Rebuild a dataset from the handle of a :class:`SharedDataset` without copying."""
+    variables = {name: xr.Variable(dims, attach_array(array_handle), attrs)
+                 for name, (dims, attrs, array_handle) in handle["variables"].items()}
+    coords = {name: variables.pop(name) for name in handle["coords"]}
+    return xr.Dataset(variables, coords=coords, attrs=handle["attrs"])
+
+
+def init_worker(handle: dict):
+    """Worker initializer attaching to a shared dataset, see :func:`shared_dataset`."""
+    global _WORKER_DATASET
+    _WORKER_DATASET = attach_dataset(handle)
+
+
+def shared_dataset() -> xr.Dataset:
+    """Return the dataset attached by :func:`init_worker` in the current process."""
+    if _WORKER_DATASET is None:
+        raise RuntimeError("No shared dataset attached. Pass `init_worker` as "
+                           "initializer to the worker pool.")
+    return _WORKER_DATASET
@@ -4,22 +4,33 @@
 # Date:   2026-05-07
 # %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
 #
+import contextlib
 import functools
 import inspect
+import io
 import logging
 import os
 from pathlib import Path
 import subprocess
 import sys
+import threading
 import pytest
 
+import dask
+from dask.base import tokenize
 import matplotlib.pyplot as plt
 import pandas as pd
 import xarray as xr
 
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
 log = logging.getLogger(__name__)
 
-__all__ = ["setup_logger", "save"]
+__all__ = ["setup_logger", "save", "load", "compression_encoding", "artefact_hash",
+           "artefact_path", "file_lock", "mpl_style"]
 
 
 def setup_logger(level=None, logfile=True, name="root"):
@@ -89,12 +100,126 @@ def setup_logger(level=None, logfile=True, name="root"):
     return logger
 
 
+@contextlib.contextmanager
+def file_lock(path):
+    """Hold an exclusive lock for `path` (advisory, for writers on shared storage).
+
+    The lock files of all paths in a directory are kept in its ``.locks`` subdirectory.
+    """
+    path = Path(path)
+    lockfile = path.parent / ".locks" / f"{path.name}.lock"
+    lockfile.parent.mkdir(parents=True, exist_ok=True)
+    with open(lockfile, "a") as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield lockfile
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def _figure_pixels(fig, **kwargs):
+    """Return the RGBA pixels of a figure as rendered by ``savefig(**kwargs)``."""
+    kwargs = {k: v for k, v in kwargs.items()
+              if k not in ("format", "metadata", "pil_kwargs")}
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format="rgba", **kwargs)
+    return buffer.getvalue()
+
+
+def artefact_hash(obj, *args, key=None, git_commit="", **kwargs):
+    """Return a hash of an object to be saved, the code version and the save parameters.
+
+    Instead of the object itself, its inputs `key` may be hashed. Lazy (dask-backed)
+    objects are hashed by their task graph, i.e. without computing them; figures by
+    their pixels as saved with the save parameters.
+    """
+    if key is None:
+        key = _figure_pixels(obj, **kwargs) if isinstance(obj, plt.Figure) else obj
+    with dask.config.set({"tokenize.ensure-deterministic": True}):
+        try:
+            return tokenize(key, git_commit, args, kwargs)
+        except RuntimeError as err:
+            raise ValueError(f"Cannot hash object of type {type(obj)}; "
+                             "pass the inputs it depends on as `key`.") from err
+
+
+def _git_commit():
+    output = subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'])
+    return output.decode('ascii').strip()
+
+
+def artefact_path(obj, path, *args, key=None, git_commit=None, **kwargs):
+    """Return the content-addressed path under which :func:`save` stores `obj`.
+
+    `path` and the further (save) parameters are those passed to :func:`save`.
+    """
+    if git_commit is None:
+        git_commit = _git_commit()
+    path = Path(path)
+    content = artefact_hash(obj, *args, key=key, git_commit=git_commit, **kwargs)
+    return path.parent / f"{path.stem}_{git_commit}_{content[:12]}{path.suffix}"
+
+
+def _temporary_path(path):
+    """Return a temporary file next to `path`, unique per process and thread."""
+    path = Path(path)
+    return path.with_name(f".{path.stem}.{os.getpid()}.{threading.get_ident()}"
+                          f"{path.suffix}")
+
+
+def _discard(path):
+    if path is not None:
+        path.unlink(missing_ok=True)
+
+
+def _is_supported(func, obj):
+    """Whether the single-dispatch `func` implements the type of `obj`."""
+    registry = getattr(func, "registry", {})
+    return object not in registry or func.dispatch(type(obj)) is not registry[object]
+
+
+def _renders_pixels(obj, path, kwargs):
+    """Whether saving `obj` leaves the pixels of the file on the canvas of a figure.
+
+    This is the case for PNG files written with an Agg canvas, so that a figure need not
+    be drawn once more for its content address.
+    """
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+    fmt = kwargs.get("format") or Path(path).suffix.lstrip(".")
+    return (isinstance(obj, plt.Figure) and isinstance(obj.canvas, FigureCanvasAgg)
+            and fmt.lower() == "png" and "backend" not in kwargs)
+
+
+def mpl_style(name):
+    """Return the path of a matplotlib style for use with :func:`plt.style.context`.
+
+    This is the style `name` in ``assets/mpl_styles`` if it exists there, else `name`
+    itself (e.g. a built-in matplotlib style).
+    """
+    from .. import BASE_DIR
+
+    path = BASE_DIR / "assets" / "mpl_styles" / f"{name}.mplstyle"
+    return str(path) if path.exists() else name
+
+
 def add_metadata(func):
     """
     A decorator that adds metadata to the function's output.
 
     The metadata includes the relative path of the file, line number, and git commit hash.
 
+    The file name is extended by the git commit hash and a hash of the object (or of the
+    given `key`) and the further arguments (see :func:`artefact_hash`), unless
+    ``add_hash=False``. If such a content-addressed artefact exists already, it is not
+    written again (unless ``overwrite=True``). Files are written to a temporary file and
+    moved into place while holding a :func:`file_lock`, so that concurrent writers are
+    safe. Objects of unsupported types are rejected before they are hashed. Figures
+    saved as PNG are drawn only once: they are written first and their content address
+    is computed from the pixels left on the canvas.
+
     Parameters
     ----------
     func : callable 
@@ -103,7 +228,7 @@ def add_metadata(func):
     Returns
     -------
     callable
-        The decorated function.
+        The decorated function, returning the path of the artefact.
 
     """
     @functools.wraps(func)
@@ -114,7 +239,7 @@ def add_metadata(func):
         filename = frame.f_code.co_filename
         line_number = frame.f_lineno #- 1   # TODO: <-- check!
         relative_path = os.path.relpath(filename)
-        git_commit = subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD']).decode('ascii').strip()
+        git_commit = _git_commit()
 
         metadata['relative_path'] = relative_path
         metadata['line_number'] = line_number
@@ -129,13 +254,36 @@ def add_metadata(func):
         
         args = list(args)
         path = Path(args[1])
-        suffix = ''
-        if kwargs.pop('add_hash', True):
-            suffix += f"_{git_commit}"
-        args[1] = f'{path.parent}/{path.stem}{suffix}{path.suffix}'
-        
+        key = kwargs.pop('key', None)
+        overwrite = kwargs.pop('overwrite', False)
+        add_hash = kwargs.pop('add_hash', True)
+        if not _is_supported(func, obj):
+            return func(*args, **kwargs)  # raises before anything is hashed
+
+        save_kwargs = dict(kwargs)
+        if isinstance(obj, plt.Figure):
+            metadata = {k:str(v) for k,v in metadata.items()}
+            save_kwargs['metadata'] = metadata
+
+        rendered = None
+        if add_hash and key is None and _renders_pixels(obj, path, kwargs):
+            # draw the figure only once: save it and hash the pixels left on its canvas
+            rendered = _temporary_path(path)
+            func(obj, str(rendered), *args[2:], **save_kwargs)
+            key = bytes(obj.canvas.buffer_rgba())
+        target = artefact_path(obj, path, *args[2:], key=key, git_commit=git_commit,
+                               **kwargs) if add_hash else path
+        args[1] = str(target)
+
         obj_type = str(type(obj)).split("'")[1].split('.')[-1]
-        
+
+        if add_hash and target.exists() and not overwrite:
+            print(f"Reuse existing {obj_type} {target}")
+            log.info(f"Log: Reuse existing artefact {target}, requested by "
+                     f"{relative_path}#{line_number} @{git_commit}")
+            _discard(rendered)
+            return target
+
         msg = f"Save {obj_type} to {args[1]}"
         if kwargs:
             kws = [f"{k}={v}" for (k,v) in kwargs.items()]
@@ -143,11 +291,25 @@ def add_metadata(func):
         print(msg)
         log.info(f"Log: {msg} to {args[1]}, produced by {relative_path}#{line_number} @{git_commit}")
 
-        if isinstance(obj, plt.Figure):
-            metadata = {k:str(v) for k,v in metadata.items()}
-            kwargs['metadata'] = metadata
-
-        return func(*args, **kwargs)
+        with file_lock(target):
+            if add_hash and target.exists() and not overwrite:
+                log.info(f"Log: {target} was written by a concurrent process")
+                _discard(rendered)
+                return target
+            if rendered is not None:
+                os.replace(rendered, target)
+                return target
+            # write to a temporary file (keeping the suffix for format detection) and
+            # move it into place atomically, so that readers never see partial files
+            tmp = _temporary_path(target)
+            args[1] = str(tmp)
+            try:
+                func(*args, **save_kwargs)
+                os.replace(tmp, target)
+            finally:
+                if tmp.exists():
+                    tmp.unlink()
+        return target
     return wrapper
 
 
@@ -181,7 +343,7 @@ def save(obj, *args, **kwargs):
     >>> fig = plt.figure()
     >>> ...
     >>> save(fig, "/tmp/myfigure.png", dpi=175)
-    Save Figure to /tmp/myfigure.png with dpi=175
+    Save Figure to /tmp/myfigure_1a2b3c4_0123456789ab.png with dpi=175
     """
     raise NotImplementedError(f"Cannot save object of type {type(obj)} using `save` method. Please use the native method.")
 
@@ -194,6 +356,74 @@ def _(fig, path, *args, **kwargs):
 def _(df, path, *args, **kwargs):
     df.to_csv(path, *args, **kwargs)
 
+def compression_encoding(ds, complevel=4, encoding=None):
+    """Return a netCDF encoding that compresses all data variables of `ds` with zlib.
+
+    Entries of an existing `encoding` take precedence.
+
+    Example
+    -------
+    >>> compression_encoding(xr.Dataset({"tas": ("x", [1.])}), complevel=5)
+    {'tas': {'zlib': True, 'complevel': 5}}
+    """
+    compressed = {name: {"zlib": True, "complevel": complevel} for name in ds.data_vars}
+    for name, enc in (encoding or {}).items():
+        compressed.setdefault(name, {}).update(enc)
+    return compressed
+
+
 @save.register(xr.Dataset)
-def _(ds, path, *args, **kwargs):
+def _(ds, path, *args, complevel=None, **kwargs):
+    if complevel:
+        kwargs['encoding'] = compression_encoding(ds, complevel, kwargs.get('encoding'))
     ds.to_netcdf(path, *args, **kwargs)
+
+@save.register(xr.DataArray)
+def _(da, path, *args, **kwargs):
+    save.__wrapped__(da.to_dataset(name=da.name or "data"), path, *args, **kwargs)
+
+
+LOADERS = {
+    ".nc": xr.open_dataset,
+    ".csv": pd.read_csv,
+    ".png": plt.imread,
+}
+
+
+def load(path, obj=None, *args, key=None, reader_kwargs=None, **kwargs):
+    """
+    Load an artefact written by :func:`save`, choosing the reader by the file suffix.
+
+    `path` is either the path returned by :func:`save` or the path originally passed to
+    it. In the latter case, the content address is computed from the object `obj` (or
+    its inputs `key`), the current git commit and the further save parameters, exactly
+    as :func:`save` does, and the artefact is loaded if it exists. `reader_kwargs` are
+    passed to the reader (:func:`xarray.open_dataset`, :func:`pandas.read_csv` or
+    :func:`matplotlib.pyplot.imread`).
+
+    Returns
+    -------
+    object or None
+        The loaded artefact, or None if no artefact with this content address exists.
+
+    Examples
+    --------
+    >>> pytest.skip()
+    >>> path = save(ds, "/tmp/stats.nc", complevel=4)
+    Save Dataset to /tmp/stats_1a2b3c4_0123456789ab.nc with complevel=4
+    >>> load(path)  # or load("/tmp/stats.nc", ds, complevel=4)
+    """
+    path = Path(path)
+    if path.suffix not in LOADERS:
+        raise NotImplementedError(f"Cannot load files of type '{path.suffix}' using "
+                                  "`load` method.")
+    if not path.exists():
+        if obj is None and key is None:
+            raise FileNotFoundError(f"{path} does not exist; pass the saved object or "
+                                    "its `key` to load its content-addressed artefact.")
+        path = artefact_path(obj, path, *args, key=key, **kwargs)
+        if not path.exists():
+            log.info(f"Log: No artefact {path}")
+            return None
+    log.info(f"Log: Load {path}")
+    return LOADERS[path.suffix](path, **(reader_kwargs or {}))
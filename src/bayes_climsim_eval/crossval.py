@@ -0,0 +1,126 @@
+# %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+# Author: Markus Ritschel
+# eMail:  git@markusritschel.de
+# Date:   2026-10-19
+# %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+#
+"""Leave-one-model-out perfect-model tests for the model weighting.
+
+Each model in turn serves as pseudo-observations and the remaining models are weighted
+against it. All required distances are entries of the model-model distance matrix, which
+is computed once by :func:`~bayes_climsim_eval.distances.pairwise_distances`. The
+weights of all held-out evaluations then follow from a single vectorised lookup and
+re-normalisation.
+"""
+import logging
+
+import numpy as np
+import xarray as xr
+
+from .weighting import _similarity, performance_weights
+
+log = logging.getLogger(__name__)
+
+__all__ = ["perfect_model_weights", "perfect_model_test"]
+
+PERFECT_DIM = "perfect_model"
+
+
+def perfect_model_weights(model_distances: xr.DataArray, sigma_d: float | xr.DataArray,
+                          sigma_s: float | xr.DataArray,
+                          dim: str = "model") -> xr.DataArray:
+    r"""Compute the weights of all leave-one-model-out evaluations at once.
+
+    For the held-out model :math:`k`, the performance distance of model :math:`i` is
+    :math:`S_{ki}` and the independence term is evaluated among the remaining models,
+    i.e.
+
+    .. math::
+
+        w_{ki} \propto \frac{\exp(-S_{ki}^2/\sigma_D^2)}
+                            {1 + \sum_{j} E_{ij} - E_{ik}}, \quad
+        E_{ij} = \exp(-S_{ij}^2/\sigma_S^2), \; E_{ii} = 0
+
+    Parameters
+    ----------
+    model_distances : xr.DataArray
+        The model-model distance matrix with dimensions ``{dim}_i`` and ``{dim}_j``.
+    sigma_d, sigma_s : float | xr.DataArray
+        The performance and similarity radii. Passing DataArrays evaluates a whole grid
+        of radii in one go.
+    dim : str
+        The name of the model dimension.
+
+    Returns
+    -------
+    xr.DataArray
+        The weights with dimensions ``perfect_model`` and `dim`. Each row sums up to one
+        and the held-out model itself gets zero weight.
+    """
+    dim_i, dim_j = f"{dim}_i", f"{dim}_j"
+    similarity = _similarity(model_distances, sigma_s, dim)
+    # E_ik, indexed by the weighted model i and the held-out model k
+    similarity_ik = similarity.rename({dim_i: dim, dim_j: PERFECT_DIM})
+    row_sum = similarity.sum(dim_j).rename({dim_i: dim})
+
+    distances = model_distances.rename({dim_i: PERFECT_DIM, dim_j: dim})
+    performance = performance_weights(distances, sigma_d)
+    weights = performance / (1 + row_sum - similarity_ik)
+    weights = weights.where(weights[PERFECT_DIM] != weights[dim], 0.0)
+    return weights / weights.sum(dim)
+
+
+def perfect_model_test(model_distances: xr.DataArray, target: xr.DataArray,
+                       sigma_d: float | xr.DataArray, sigma_s: float | xr.DataArray,
+                       dim: str = "model") -> xr.Dataset:
+    """Evaluate the skill of the weighting in a leave-one-model-out perfect-model test.
+
+    For every held-out model, the weighted mean of `target` over the remaining models is
+    compared with the held-out model's own `target` and with the unweighted mean of the
+    remaining models.
+
+    Parameters
+    ----------
+    model_distances : xr.DataArray
+        The model-model distance matrix with dimensions ``{dim}_i`` and ``{dim}_j``.
+    target : xr.DataArray
+        The quantity to be predicted (e.g. the future warming) along `dim`. Any further
+        dimensions (e.g. grid cells) are retained.
+    sigma_d, sigma_s : float | xr.DataArray
+        The performance and similarity radii.
+    dim : str
+        The name of the model dimension.
+
+    Returns
+    -------
+    xr.Dataset
+        Containing the ``weights``, the weighted and unweighted ``prediction``s and
+        ``error``s per held-out model, their root-mean-square errors and the ``skill``
+        (one minus the ratio of weighted to unweighted RMSE).
+    """
+    weights = perfect_model_weights(model_distances, sigma_d, sigma_s, dim=dim)
+    truth = target.rename({dim: PERFECT_DIM})
+
+    n_models = target.sizes[dim]
+    uniform = xr.ones_like(weights.isel({d: 0 for d in weights.dims
+                                         if d not in (PERFECT_DIM, dim)}, drop=True))
+    uniform = uniform.where(uniform[PERFECT_DIM] != uniform[dim], 0.0) / (n_models - 1)
+
+    prediction = xr.dot(weights, target, dim=dim)
+    baseline = xr.dot(uniform, target, dim=dim)
+    error = prediction - truth
+    baseline_error = baseline - truth
+
+    rmse = np.sqrt((error ** 2).mean(PERFECT_DIM))
+    baseline_rmse = np.sqrt((baseline_error ** 2).mean(PERFECT_DIM))
+    log.debug("Perfect-model test over %d models", n_models)
+    return xr.Dataset({
+        "weights": weights,
+        "prediction": prediction,
+        "baseline_prediction": baseline,
+        "error": error,
+        "baseline_error": baseline_error,
+        "rmse": rmse,
+        "baseline_rmse": baseline_rmse,
+        "skill": 1 - rmse / baseline_rmse,
+    })
@@ -0,0 +1,327 @@
+# %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+# Author: Markus Ritschel
+# eMail:  git@markusritschel.de
+# Date:   2026-10-19
+# %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+#
+"""Area-weighted distances between model fields and between models and observations.
+
+All model fields are expected as a single :class:`xarray.DataArray` with a model
+dimension (``model`` by default), an optional ``time`` dimension and an arbitrary number
+of spatial dimensions. The data may be dask-backed; the distance matrices are then
+accumulated lazily over time chunks and evaluated in a single parallel
+:func:`dask.compute` call.
+"""
+import logging
+import os
+import threading
+from pathlib import Path
+
+import dask
+import numpy as np
+import xarray as xr
+from dask.base import tokenize
+
+from .precision import promote, unpack, valid
+
+log = logging.getLogger(__name__)
+
+__all__ = ["pairwise_distances", "observation_distances", "DistanceMatrixCache"]
+
+METRICS = ("rmse", "correlation")
+
+
+def _common_weights(field, weights, dim):
+    """Return the area weights broadcast to a single model field.
+
+    The weight is zero where any of the models is missing.
+    """
+    template = field.isel({dim: 0}, drop=True)
+    if weights is None:
+        weights = xr.ones_like(template, dtype=np.float64)
+    weights = weights.broadcast_like(template).astype(np.float64)
+    return weights.where(valid(field).all(dim), 0.0)
+
+
+def _time_slices(field, time_chunk):
+    if "time" not in field.dims or not time_chunk:
+        yield {}
+        return
+    nt = field.sizes["time"]
+    for start in range(0, nt, time_chunk):
+        yield {"time": slice(start, start + time_chunk)}
+
+
+def _model_blocks(start, stop, block_size):
+    size = block_size or (stop - start) or 1
+    return [slice(s, min(s + size, stop)) for s in range(start, stop, size)]
+
+
+def _flatten(obj, dim=None):
+    """Return the data of `obj` as a 2D array (dim, points) or a 1D array (points)."""
+    if dim is None:
+        return obj.data.reshape(-1)
+    other = [d for d in obj.dims if d != dim]
+    return obj.transpose(dim, *other).data.reshape(obj.sizes[dim], -1)
+
+
+def _accumulate(field, weights, metric, time_chunk, dim, pairs):
+    """Accumulate the Gram matrix blocks and the weighted moments over time chunks.
+
+    These are the blocks `pairs` = [(rows, cols), ...] of the weighted Gram matrix, the
+    weighted sums, the weighted sums of squares and the total weight. For dask-backed
+    input, everything is evaluated in one parallel compute call.
+    """
+    grams = [0.0] * len(pairs)
+    sums, squares, total = 0.0, 0.0, 0.0
+    shift = None
+    for sl in _time_slices(field, time_chunk):
+        # promote reduced-precision data to float64 only chunk-wise, inside the
+        # accumulator
+        x = _flatten(promote(field.isel(sl)), dim)
+        x = np.where(np.isnan(x), 0.0, x)
+        w = _flatten(weights.isel(sl))
+        if metric == "rmse":
+            # Distances are invariant under subtracting a common field. Centering on the
+            # ensemble mean keeps the Gram matrix well-conditioned for near-duplicates.
+            x = x - x.mean(axis=0)
+        else:
+            # Correlations are only invariant under a common scalar shift
+            if shift is None:
+                shift = (x * w).sum() / np.maximum(w.sum() * x.shape[0], 1e-300)
+            x = x - shift
+        xw = x * w
+        for k, (rows, cols) in enumerate(pairs):
+            grams[k] = grams[k] + xw[rows] @ x[cols].T
+        sums = sums + xw.sum(axis=1)
+        squares = squares + (xw * x).sum(axis=1)
+        total = total + w.sum()
+    return dask.compute(grams, sums, squares, total)
+
+
+def _assemble(n, pairs, grams):
+    """Assemble the computed blocks into a symmetric matrix with NaN for unknowns."""
+    gram = np.full((n, n), np.nan)
+    for (rows, cols), block in zip(pairs, grams, strict=True):
+        gram[rows, cols] = block
+        gram[cols, rows] = np.asarray(block).T
+    return gram
+
+
+def _finalize(gram, sums, squares, total, metric):
+    """Convert the accumulated statistics into a distance matrix."""
+    if metric == "rmse":
+        d2 = (squares[:, None] + squares[None, :] - 2 * gram) / total
+        dist = np.sqrt(np.clip(d2, 0, None))
+    else:
+        mean = sums / total
+        var = np.clip(squares / total - mean ** 2, 0, None)
+        cov = gram / total - np.outer(mean, mean)
+        corr = cov / np.sqrt(np.outer(var, var))
+        dist = 1 - np.clip(corr, -1, 1)
+    np.fill_diagonal(dist, 0.0)
+    # remove asymmetries introduced by floating point round-off
+    return (dist + dist.T) / 2
+
+
+def _compute(field, weights, metric, time_chunk, dim, rows, model_block):
+    """Compute the distances of the models at positions `rows` to all models in `field`.
+
+    Only the upper triangle of the blocked Gram matrix is evaluated; the remaining
+    entries follow from symmetry. Entries that are not computed are NaN.
+    """
+    n = field.sizes[dim]
+    row_blocks = _model_blocks(rows.start, rows.stop, model_block)
+    col_blocks = _model_blocks(0, rows.start, model_block) + row_blocks
+    pairs = [(r, c) for r in row_blocks for c in col_blocks
+             if c.stop <= rows.start or c.start >= r.start]
+    if rows.stop < n:
+        raise ValueError("The models to be computed must be the last ones in `field`.")
+    log.debug("Compute %s distances of %d models to %d models in %d blocks",
+              metric, rows.stop - rows.start, n, len(pairs))
+    grams, sums, squares, total = _accumulate(field, weights, metric, time_chunk, dim,
+                                              pairs)
+    gram = _assemble(n, pairs, grams)
+    return _finalize(gram, np.asarray(sums), np.asarray(squares), float(total), metric)
+
+
+def _model_names(field, dim):
+    return field[dim].values if dim in field.coords else np.arange(field.sizes[dim])
+
+
+def _to_dataarray(dist, names, metric, dim):
+    return xr.DataArray(dist, dims=(f"{dim}_i", f"{dim}_j"),
+                        coords={f"{dim}_i": names, f"{dim}_j": names},
+                        name=f"{metric}_distance", attrs={"metric": metric})
+
+
+def pairwise_distances(field: xr.DataArray, weights: xr.DataArray | None = None,
+                       metric: str = "rmse", time_chunk: int | None = 120,
+                       model_block: int | None = None,
+                       dim: str = "model") -> xr.DataArray:
+    """Compute the matrix of area-weighted distances between all pairs of models.
+
+    Instead of looping over model pairs, the weighted Gram matrix :math:`X W X^T` is
+    accumulated over chunks of ``time_chunk`` time steps, from which all distances
+    follow in closed form. With `model_block`, the Gram matrix is split into blocks of
+    models of which only the upper triangle is computed. Grid cells that are missing in
+    any of the models are ignored.
+
+    Parameters
+    ----------
+    field : xr.DataArray
+        The model fields with dimension `dim` and optionally a ``time`` dimension.
+    weights : xr.DataArray, optional
+        Area weights (e.g. cell areas or cos(lat)), broadcastable against a single model
+        field.
+    metric : str
+        Either ``"rmse"`` (area-weighted root-mean-square difference) or
+        ``"correlation"`` (one minus the area-weighted pattern correlation).
+    time_chunk : int, optional
+        Number of time steps processed at once. If None, all time steps are processed
+        together.
+    model_block : int, optional
+        Number of models per block of the Gram matrix. If None, a single block is used.
+    dim : str
+        The name of the model dimension.
+
+    Returns
+    -------
+    xr.DataArray
+        The symmetric distance matrix with dimensions ``{dim}_i`` and ``{dim}_j``.
+    """
+    if metric not in METRICS:
+        raise ValueError(f"Unknown metric '{metric}'. Choose one of {METRICS}.")
+    weights = _common_weights(field, weights, dim)
+    dist = _compute(field, weights, metric, time_chunk, dim,
+                    slice(0, field.sizes[dim]), model_block)
+    return _to_dataarray(dist, _model_names(field, dim), metric, dim)
+
+
+def observation_distances(field: xr.DataArray, obs: xr.DataArray,
+                          weights: xr.DataArray | None = None, metric: str = "rmse",
+                          time_chunk: int | None = 120,
+                          dim: str = "model") -> xr.DataArray:
+    """Compute the area-weighted distance of each model to the observations.
+
+    The observations are appended as an additional member of the ensemble so that the
+    same (masking and weighting) conventions apply as in :func:`pairwise_distances`, but
+    only their row of the distance matrix is computed.
+
+    Returns
+    -------
+    xr.DataArray
+        The distances along dimension `dim`.
+    """
+    if metric not in METRICS:
+        raise ValueError(f"Unknown metric '{metric}'. Choose one of {METRICS}.")
+    n = field.sizes[dim]
+    # differently packed int16 data cannot share the packing attributes
+    obs = unpack(obs).expand_dims({dim: ["__obs__"]})
+    combined = xr.concat([unpack(field), obs], dim=dim, coords="minimal",
+                         compat="override", join="override")
+    weights = _common_weights(combined, weights, dim)
+    dist = _compute(combined, weights, metric, time_chunk, dim, slice(n, n + 1), None)
+    names = _model_names(field, dim)
+    return xr.DataArray(dist[n, :n], dims=dim, coords={dim: names},
+                        name=f"{metric}_distance", attrs={"metric": metric})
+
+
+class DistanceMatrixCache:
+    """A persistent cache of model-model distance matrices, keyed on the model set.
+
+    For each combination of `key` (e.g. variable, region and season), metric, area
+    weights and the structure of the field (its name, sizes and coordinates apart from
+    the models), a single matrix over all models seen so far is stored. Requesting the
+    distances for a model set only computes the rows of models whose distances are not
+    yet known, e.g. adding one model to an ensemble computes one new row.
+
+    Note that the cached distances assume a common land-sea mask across all models, as
+    otherwise the set of valid grid cells would change with every added model.
+
+    Parameters
+    ----------
+    directory : str | Path, optional
+        The cache directory. Defaults to ``DATA_DIR/cache/distances``.
+
+    Examples
+    --------
+    >>> cache = DistanceMatrixCache()  # doctest: +SKIP
+    >>> dist = cache.pairwise_distances(tas, "tas_JJA", weights)  # doctest: +SKIP
+    """
+
+    def __init__(self, directory: str | Path | None = None):
+        if directory is None:
+            from . import DATA_DIR
+            directory = DATA_DIR / "cache" / "distances"
+        self.directory = Path(directory)
+
+    def path(self, key: str, metric: str, weights: xr.DataArray | None = None,
+             field: xr.DataArray | None = None, dim: str = "model") -> Path:
+        """Return the cache file of the given key, metric, area weights and field."""
+        structure = None
+        if field is not None:
+            structure = (field.name,
+                         {d: size for d, size in field.sizes.items() if d != dim},
+                         {name: coord.values for name, coord in field.coords.items()
+                          if dim not in coord.dims})
+        token = tokenize(key, metric, weights, structure)
+        return self.directory / f"{metric}_{token}.npz"
+
+    def load(self, path: Path) -> xr.DataArray | None:
+        """Load a cached distance matrix (with NaN for unknown pairs), if present."""
+        if not path.exists():
+            return None
+        with np.load(path, allow_pickle=False) as cached:
+            names, dist = cached["names"], cached["distances"]
+        return xr.DataArray(dist, dims=("i", "j"), coords={"i": names, "j": names})
+
+    def _store(self, path, dist):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp.npz")
+        np.savez(tmp, names=dist["i"].values.astype(str), distances=dist.values)
+        os.replace(tmp, path)
+
+    def pairwise_distances(self, field: xr.DataArray, key: str,
+                           weights: xr.DataArray | None = None, metric: str = "rmse",
+                           time_chunk: int | None = 120, model_block: int | None = None,
+                           dim: str = "model") -> xr.DataArray:
+        """Return the distance matrix of the models in `field`, computing unknown rows.
+
+        The parameters are the same as for :func:`pairwise_distances`. The model
+        coordinate of `field` must hold unique model names. `key` names the field (e.g.
+        variable, region and season); together with the structure of `field` it
+        identifies the cached matrix.
+        """
+        if metric not in METRICS:
+            raise ValueError(f"Unknown metric '{metric}'. Choose one of {METRICS}.")
+        names = [str(name) for name in field[dim].values]
+        path = self.path(key, metric, weights, field, dim)
+        cached = self.load(path)
+
+        known = []
+        if cached is not None:
+            available = [name for name in names if name in cached["i"]]
+            subset = cached.sel(i=available, j=available)
+            incomplete = subset.isnull().any("j").values
+            known = [name for name, row in zip(available, incomplete, strict=True)
+                     if not row]
+        missing = [name for name in names if name not in known]
+        log.info("Distance cache %s: %d models known, %d to compute",
+                 path.name, len(known), len(missing))
+
+        order = known + missing
+        if missing:
+            ordered = field.sel({dim: order})
+            area = _common_weights(ordered, weights, dim)
+            dist = _compute(ordered, area, metric, time_chunk, dim,
+                            slice(len(known), len(order)), model_block)
+            dist = xr.DataArray(dist, dims=("i", "j"), coords={"i": order, "j": order})
+            if cached is not None:
+                dist = dist.combine_first(cached)
+            self._store(path, dist)
+        else:
+            dist = cached
+
+        dist = dist.sel(i=names, j=names).values
+        return _to_dataarray(dist, field[dim].values, metric, dim)
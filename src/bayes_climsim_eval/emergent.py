@@ -0,0 +1,163 @@
+# %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+# Author: Markus Ritschel
+# eMail:  git@markusritschel.de
+# Date:   2026-10-19
+# %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+#
+r"""Screening of emergent constraints across many candidate predictors.
+
+An emergent constraint regresses a future response :math:`y` across models on a
+present-day predictor :math:`x` and propagates the observed :math:`x_o` through the
+regression. All candidate predictors (grid cells, regions, seasons, ...) are fitted at
+once from the cross-model sums, i.e. as one batched least-squares problem that dask
+evaluates chunk by chunk over the candidate dimensions. With a flat prior, the posterior
+predictive of the response is a Student-t distribution with :math:`n-2` degrees of
+freedom,
+
+.. math::
+
+    y \mid x_o \sim t_{n-2}\left(a + b x_o,\;
+    s^2 \left(1 + \frac{1}{n} + \frac{(x_o - \bar{x})^2}{S_{xx}}\right)
+    + b^2 \sigma_o^2\right),
+
+where the observational uncertainty :math:`\sigma_o` enters as in Cox et al. (2018).
+Candidates are ranked by their Benjamini–Hochberg q-values, which control the false
+discovery rate among the predictors declared significant.
+"""
+import logging
+
+import numpy as np
+import pandas as pd
+import xarray as xr
+from scipy import special
+
+from .precision import promote
+
+log = logging.getLogger(__name__)
+
+__all__ = ["fit_emergent_constraints", "benjamini_hochberg", "rank_predictors"]
+
+
+def _t_sf(t, dof):
+    """Two-sided p-values of Student-t statistics."""
+    return xr.apply_ufunc(lambda t, k: 2 * special.stdtr(k, -np.abs(t)), t, dof,
+                          dask="parallelized", output_dtypes=[np.float64])
+
+
+def _t_ppf(q, dof):
+    return xr.apply_ufunc(lambda k: special.stdtrit(k, q), dof,
+                          dask="parallelized", output_dtypes=[np.float64])
+
+
+def fit_emergent_constraints(predictors: xr.DataArray, response: xr.DataArray,
+                             obs: xr.DataArray | float,
+                             obs_std: xr.DataArray | float = 0.0,
+                             dim: str = "model", chunks: dict | None = None,
+                             interval: float = 0.66) -> xr.Dataset:
+    """Fit the cross-model regressions of all candidates and constrain the response.
+
+    Parameters
+    ----------
+    predictors : xr.DataArray
+        The present-day predictor of each model and candidate, e.g. dims (model, season,
+        lat, lon). Models with missing values are excluded per candidate.
+    response : xr.DataArray
+        The future response of each model, broadcastable against `predictors`.
+    obs, obs_std : xr.DataArray | float
+        The observed predictor and its (1-sigma) uncertainty per candidate.
+    dim : str
+        The model dimension.
+    chunks : dict, optional
+        Chunks of the candidate dimensions, e.g. ``{"lat": 30}``, for large numbers of
+        candidates held in memory.
+    interval : float
+        The probability of the reported central interval of the posterior predictive.
+
+    Returns
+    -------
+    xr.Dataset
+        Per candidate: ``n``, ``slope``, ``intercept``, ``correlation``,
+        ``residual_std``, ``pvalue`` (of a non-zero slope), the posterior predictive
+        ``mean``, ``std``, ``lower`` and ``upper`` bounds, and the
+        ``variance_reduction`` relative to the unconstrained model spread. The result is
+        lazy for dask-backed input.
+    """
+    if chunks:
+        predictors = predictors.chunk({dim: -1, **chunks})
+    x = promote(predictors)
+    y = promote(response).broadcast_like(x)
+    valid = x.notnull() & y.notnull()
+    x, y = x.where(valid), y.where(valid)
+    n = valid.sum(dim)
+    x_mean, y_mean = x.mean(dim), y.mean(dim)
+    sxx = ((x - x_mean) ** 2).sum(dim)
+    syy = ((y - y_mean) ** 2).sum(dim)
+    sxy = ((x - x_mean) * (y - y_mean)).sum(dim)
+
+    dof = (n - 2).where(n > 2)
+    slope = sxy / sxx
+    intercept = y_mean - slope * x_mean
+    correlation = sxy / np.sqrt(sxx * syy)
+    residual_var = (syy - slope * sxy).clip(min=0) / dof
+    tstat = correlation * np.sqrt(dof / (1 - correlation ** 2))
+
+    mean = intercept + slope * obs
+    var = (residual_var * (1 + 1 / n + (obs - x_mean) ** 2 / sxx)
+           + slope ** 2 * obs_std ** 2)
+    scale = np.sqrt(var)
+    # the variance of a t-distribution is scale^2 k / (k - 2)
+    std = scale * np.sqrt(dof / (dof - 2)).where(dof > 2)
+    half_width = scale * _t_ppf(0.5 + interval / 2, dof)
+    result = xr.Dataset({
+        "n": n,
+        "slope": slope,
+        "intercept": intercept,
+        "correlation": correlation,
+        "residual_std": np.sqrt(residual_var),
+        "pvalue": _t_sf(tstat, dof),
+        "mean": mean,
+        "std": std,
+        "lower": mean - half_width,
+        "upper": mean + half_width,
+        "variance_reduction": 1 - std ** 2 / (syy / (n - 1)),
+    })
+    result.attrs.update({"interval": interval, "regressed_over": dim})
+    return result
+
+
+def benjamini_hochberg(pvalues: xr.DataArray) -> xr.DataArray:
+    r"""Return the Benjamini–Hochberg q-values of all (non-missing) p-values.
+
+    A candidate is significant at false discovery rate :math:`\alpha` if its q-value is
+    at most :math:`\alpha`.
+
+    Example
+    -------
+    >>> benjamini_hochberg(xr.DataArray([0.01, 0.04, 0.03, 0.5])).values
+    array([0.04      , 0.05333333, 0.05333333, 0.5       ])
+    """
+    p = np.asarray(pvalues.values, dtype=np.float64).ravel()
+    finite = np.isfinite(p)
+    order = np.argsort(p[finite])
+    ranked = p[finite][order] * finite.sum() / np.arange(1, finite.sum() + 1)
+    q_sorted = np.minimum.accumulate(ranked[::-1])[::-1].clip(max=1)
+    q = np.full(p.shape, np.nan)
+    q[np.flatnonzero(finite)[order]] = q_sorted
+    return pvalues.copy(data=q.reshape(pvalues.shape)).rename("qvalue")
+
+
+def rank_predictors(result: xr.Dataset, alpha: float = 0.05, top: int | None = None,
+                    by: str = "variance_reduction") -> pd.DataFrame:
+    """Rank the candidate predictors, keeping only those significant at FDR `alpha`.
+
+    Computes `result` (if lazy), adds the Benjamini–Hochberg ``qvalue`` over all
+    candidates and returns the significant candidates sorted by `by` (descending), at
+    most `top`.
+    """
+    result = result.compute()
+    result = result.assign(qvalue=benjamini_hochberg(result.pvalue))
+    table = result.to_dataframe()
+    table = table[table.qvalue <= alpha].sort_values(by, ascending=False)
+    log.info("%d of %d candidate predictors are significant at FDR %.2f",
+             len(table), int(result.pvalue.notnull().sum()), alpha)
+    return table.head(top) if top else table
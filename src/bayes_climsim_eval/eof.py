@@ -0,0 +1,137 @@
+# %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+# Author: Markus Ritschel
+# eMail:  git@markusritschel.de
+# Date:   2026-10-19
+# %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+#
+r"""Empirical orthogonal functions (EOFs) and projections onto a common basis.
+
+The anomalies are weighted with :math:`\sqrt{\cos \varphi}`, so that the EOFs are the
+principal axes of the area-weighted covariance. The decomposition works on the dask
+array of the (time x space) anomaly matrix, either with a randomized SVD (Halko et al.,
+2011), which only needs a few passes over the chunks, or exactly with a tall-and-skinny
+QR of the transposed matrix chunked along space.
+
+The EOFs are returned in the weighted space, where they are orthonormal. Projecting any
+number of models onto them is a single (batched) matrix product of their weighted
+anomalies with the EOFs, see :func:`project`. Missing values count as zero anomalies.
+"""
+import logging
+
+import dask
+import dask.array
+import numpy as np
+import xarray as xr
+
+from .precision import promote
+
+log = logging.getLogger(__name__)
+
+__all__ = ["area_weights", "eof", "project"]
+
+SVD_METHODS = ("randomized", "exact")
+
+
+def area_weights(lat: xr.DataArray) -> xr.DataArray:
+    r"""Return the EOF weights :math:`\sqrt{\cos \varphi}` of latitudes in degrees."""
+    return np.sqrt(np.cos(np.deg2rad(lat)).clip(min=0))
+
+
+def _weighted_anomalies(field, dim, lat):
+    field = promote(field)
+    anomalies = field - field.mean(dim)
+    return (anomalies * area_weights(field[lat])).fillna(0)
+
+
+def eof(field: xr.DataArray, n_modes: int = 10, dim: str = "time", lat: str = "lat",
+        method: str = "randomized", n_power_iter: int = 2, seed: int | None = None,
+        space_chunk: int = 20000) -> xr.Dataset:
+    """Return the leading EOFs of a field.
+
+    Parameters
+    ----------
+    field : xr.DataArray
+        The (dask-backed) field, e.g. observations with dims (time, lat, lon).
+    n_modes : int
+        The number of modes.
+    dim : str
+        The sample dimension. All other dimensions are treated as space.
+    lat : str
+        The name of the latitude coordinate used for the area weights.
+    method : str
+        ``"randomized"`` (:func:`dask.array.linalg.svd_compressed`) or ``"exact"``
+        (:func:`dask.array.linalg.svd` of the space-chunked transposed matrix; requires
+        all time steps of a chunk to fit into memory).
+    n_power_iter : int
+        The number of power iterations of the randomized SVD. More iterations improve
+        the accuracy of the trailing modes at the cost of further passes over the data.
+    seed : int, optional
+        The seed of the randomized SVD.
+    space_chunk : int
+        The chunk size along the stacked space dimension.
+
+    Returns
+    -------
+    xr.Dataset
+        With the orthonormal ``eofs`` (mode, space...) in the area-weighted space (NaN
+        where the field is never observed), the principal components ``pcs`` (dim,
+        mode), the ``explained_variance`` and the ``explained_variance_ratio``.
+    """
+    if method not in SVD_METHODS:
+        raise ValueError(f"Unknown method '{method}'. Choose one of {SVD_METHODS}.")
+    spatial = [d for d in field.dims if d != dim]
+    anomalies = _weighted_anomalies(field, dim, lat)
+    stacked = anomalies.stack(space=spatial).transpose(dim, "space")
+    x = dask.array.asarray(stacked.data).rechunk({0: -1, 1: space_chunk})
+    log.debug("Compute %d EOFs of a %s matrix with the %s SVD", n_modes, x.shape,
+              method)
+    if method == "randomized":
+        u, s, v = dask.array.linalg.svd_compressed(x, k=n_modes,
+                                                   n_power_iter=n_power_iter, seed=seed)
+    else:
+        vt, s, ut = dask.array.linalg.svd(x.T)
+        u, s, v = ut.T[:, :n_modes], s[:n_modes], vt.T[:n_modes]
+    u, s, v, total, observed = dask.compute(u, s, v, (x ** 2).sum(),
+                                            field.notnull().any(dim))
+
+    # fix the arbitrary sign: the largest loading of each EOF is positive
+    sign = np.sign(v[np.arange(len(s)), np.abs(v).argmax(axis=1)])
+    u, v = u * sign, v * sign[:, None]
+
+    mode = np.arange(1, len(s) + 1)
+    eofs = xr.DataArray(v, dims=("mode", "space"),
+                        coords={"mode": mode, "space": stacked.space})
+    eofs = eofs.unstack("space").transpose("mode", *spatial).where(observed)
+    n = field.sizes[dim]
+    return xr.Dataset({
+        "eofs": eofs,
+        "pcs": xr.DataArray(u * s, dims=(dim, "mode"),
+                            coords={dim: field[dim], "mode": mode}),
+        "explained_variance": ("mode", s ** 2 / (n - 1)),
+        "explained_variance_ratio": ("mode", s ** 2 / total),
+    }, attrs={"method": method, "weighting": "sqrt(cos(lat))"})
+
+
+def project(fields: xr.DataArray, eofs: xr.Dataset | xr.DataArray, dim: str = "time",
+            lat: str = "lat") -> xr.DataArray:
+    """Project the anomalies of (many) fields onto a common EOF basis.
+
+    Parameters
+    ----------
+    fields : xr.DataArray
+        The fields on the grid of the EOFs, e.g. all models with dims (model, time, lat,
+        lon). Anomalies are taken with respect to each field's own mean along `dim`.
+    eofs : xr.Dataset | xr.DataArray
+        The result of :func:`eof` (e.g. of the observations) or its ``eofs``.
+
+    Returns
+    -------
+    xr.DataArray
+        The principal components with the non-spatial dims of `fields` and ``mode``,
+        lazy for dask-backed input.
+    """
+    if isinstance(eofs, xr.Dataset):
+        eofs = eofs.eofs
+    spatial = [d for d in eofs.dims if d != "mode"]
+    pcs = xr.dot(_weighted_anomalies(fields, dim, lat), eofs.fillna(0), dim=spatial)
+    return pcs.rename("pcs")
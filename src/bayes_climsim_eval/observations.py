@@ -0,0 +1,290 @@
+# %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+# Author: Markus Ritschel
+# eMail:  git@markusritschel.de
+# Date:   2026-10-19
+# %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+#
+"""Analysis-ready store of observational products.
+
+Each product (e.g. ERA5, HadCRUT) is ingested once: its files are opened with a
+harmonised time axis (see :func:`~bayes_climsim_eval.timeaxis.open_harmonised`),
+interpolated to the common grid and written as chunked zarr store, together with the
+climatology of a baseline period and a mask of sufficiently observed grid cells::
+
+    store = ObservationStore()
+    store.ingest("hadcrut5", "data/raw/HadCRUT.5.0.2.0.*.nc", version="5.0.2.0",
+                 grid=grid)
+    tas = store.open("hadcrut5", anomalies=True).tas
+
+The manifest ``manifest.json`` records the version, the ingestion options and the
+SHA-256 checksums of the source files. Ingesting an unchanged product again is a no-op,
+and opening a product only reads the consolidated zarr metadata.
+"""
+import datetime
+import glob
+import hashlib
+import json
+import logging
+import shutil
+from pathlib import Path
+
+import xarray as xr
+
+from .core.utils import file_lock
+from .timeaxis import (
+    day_index_to_year_month,
+    month_index_to_year_month,
+    open_harmonised,
+)
+
+log = logging.getLogger(__name__)
+
+__all__ = ["ObservationStore", "file_checksum"]
+
+PARTS = ("data", "baseline", "mask")
+
+
+def file_checksum(path: str | Path, blocksize: int = 2 ** 20) -> str:
+    """Return the SHA-256 checksum of a file."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(blocksize), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _source_files(paths):
+    paths = [paths] if isinstance(paths, (str, Path)) else list(paths)
+    files = sorted({f for pattern in paths
+                    for f in glob.glob(str(pattern)) or [str(pattern)]})
+    missing = [f for f in files if not Path(f).exists()]
+    if missing:
+        raise FileNotFoundError(f"Source files not found: {missing}")
+    return files
+
+
+def _year_month(ds):
+    """Return the years and months of the integer month or day index of `ds`."""
+    time = ds.time
+    if time.attrs.get("long_name") == "day index":
+        years, months = day_index_to_year_month(time.values,
+                                                time.attrs.get("calendar", "standard"))
+    else:
+        years, months = month_index_to_year_month(time.values)
+    return (xr.DataArray(years, dims="time", coords={"time": time}),
+            xr.DataArray(months, dims="time", coords={"time": time}))
+
+
+def _month_of_year(ds):
+    return _year_month(ds)[1]
+
+
+def _baseline(ds, baseline):
+    """Return the monthly climatology of the years `baseline` (inclusive)."""
+    years = _year_month(ds)[0]
+    selected = ds.sel(time=(years >= baseline[0]) & (years <= baseline[1]))
+    if selected.sizes["time"] == 0:
+        raise ValueError(f"No data within the baseline period {baseline}.")
+    return selected.groupby(_month_of_year(selected).rename("month")).mean("time")
+
+
+def _mask(ds, min_coverage):
+    """Return the cells where at least `min_coverage` of the time steps are observed."""
+    coverage = ds.notnull().mean("time")
+    mask = coverage >= min_coverage
+    return mask.assign_attrs(min_coverage=min_coverage)
+
+
+def _wrap_longitudes(ds, lon):
+    """Convert the longitudes of `ds` to the convention of the target `lon`.
+
+    Longitudes are mapped to [-180, 180) if the target has negative longitudes and to
+    [0, 360) otherwise, and sorted. A global grid is padded with one cyclic column on
+    each side, so that target longitudes across the seam are interpolated periodically.
+    """
+    if float(lon.min()) < 0:
+        converted = (ds.lon + 180) % 360 - 180
+    else:
+        converted = ds.lon % 360
+    ds = ds.assign_coords(lon=converted).sortby("lon")
+    spacing = float(ds.lon.diff("lon").max()) if ds.sizes["lon"] > 1 else 360.
+    if 360 - float(ds.lon[-1] - ds.lon[0]) > 1.5 * spacing:
+        return ds  # regional grid, no periodic wrap
+    west = ds.isel(lon=[-1]).assign_coords(lon=ds.lon[[-1]] - 360)
+    east = ds.isel(lon=[0]).assign_coords(lon=ds.lon[[0]] + 360)
+    return xr.concat([west, ds, east], dim="lon", data_vars="minimal", coords="minimal",
+                     compat="override")
+
+
+class ObservationStore:
+    """Directory of analysis-ready observational products with a manifest.
+
+    Parameters
+    ----------
+    directory : str | Path, optional
+        The location of the store. Defaults to ``DATA_DIR/observations``.
+    """
+
+    def __init__(self, directory: str | Path | None = None):
+        if directory is None:
+            from . import DATA_DIR
+            directory = DATA_DIR / "observations"
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.manifest_path = self.directory / "manifest.json"
+
+    @property
+    def manifest(self) -> dict:
+        """The manifest entries of all ingested products."""
+        if not self.manifest_path.exists():
+            return {}
+        return json.loads(self.manifest_path.read_text())
+
+    def products(self) -> list[str]:
+        """Return the names of the ingested products."""
+        return sorted(self.manifest)
+
+    def path(self, product: str, part: str = "data") -> Path:
+        """Return the path of the zarr store of a part (data, baseline or mask)."""
+        if part not in PARTS:
+            raise ValueError(f"Unknown part '{part}'. Choose one of {PARTS}.")
+        return self.directory / product / f"{part}.zarr"
+
+    def ingest(self, product: str, paths, version: str, grid: xr.Dataset | None = None,
+               baseline: tuple = (1981, 2010), freq: str = "month", variables=None,
+               chunks: dict | None = None, min_coverage: float = 0.8,
+               method: str = "linear", force: bool = False) -> dict:
+        """Ingest an observational product into the store unless it is up to date.
+
+        Parameters
+        ----------
+        product : str
+            The name of the product in the store.
+        paths : str | list
+            The source files or glob patterns.
+        version : str
+            The version of the product, recorded in the manifest.
+        grid : xr.Dataset, optional
+            A dataset with the ``lat`` and ``lon`` coordinates of the common grid. The
+            data are interpolated bilinearly (`method`) onto it, periodically in
+            longitude for global grids and in the longitude convention of `grid`.
+            Defaults to the native grid.
+        baseline : tuple
+            The first and last year of the anomaly baseline period.
+        freq : str
+            The frequency of the time axis, see
+            :func:`~bayes_climsim_eval.timeaxis.open_harmonised`.
+        variables : list, optional
+            The variables to be ingested. Defaults to all data variables.
+        chunks : dict, optional
+            The chunks of the store. Defaults to 120 time steps and full spatial fields.
+        min_coverage : float
+            The minimum fraction of observed time steps of a grid cell in the mask.
+        force : bool
+            Re-ingest even if version, sources and options are unchanged.
+
+        Returns
+        -------
+        dict
+            The manifest entry of the product.
+        """
+        files = _source_files(paths)
+        options = {"grid": None if grid is None else {"lat": grid.lat.values.tolist(),
+                                                      "lon": grid.lon.values.tolist()},
+                   "baseline": list(baseline), "freq": freq, "variables": variables,
+                   "min_coverage": min_coverage, "method": method}
+        with file_lock(self.directory / product):
+            entry = self.manifest.get(product)
+            checksums = {f: file_checksum(f) for f in files}
+            if (not force and entry is not None and entry["version"] == version
+                    and entry["sources"] == checksums and entry["options"] == options
+                    and all(self.path(product, part).exists() for part in PARTS)):
+                log.info("Observation product '%s' (version %s) is up to date",
+                         product, version)
+                return entry
+
+            log.info("Ingest observation product '%s' (version %s) from %d files",
+                     product, version, len(files))
+            ds = open_harmonised(files, freq=freq)
+            if variables:
+                ds = ds[list(variables)]
+            if grid is not None:
+                ds = _wrap_longitudes(ds, grid.lon)
+                ds = ds.interp(lat=grid.lat, lon=grid.lon, method=method)
+            ds = ds.chunk(chunks or {"time": 120,
+                                     **{d: -1 for d in ds.dims if d != "time"}})
+            ds.attrs.update({"product": product, "version": version})
+            parts = {"data": ds, "baseline": _baseline(ds, baseline),
+                     "mask": _mask(ds, min_coverage)}
+
+            tmp = self.directory / product / ".ingest"
+            shutil.rmtree(tmp, ignore_errors=True)
+            tmp.mkdir(parents=True)
+            for part, obj in parts.items():
+                for var in obj.variables.values():
+                    var.encoding.clear()
+                obj.to_zarr(tmp / f"{part}.zarr", consolidated=True)
+            for part in PARTS:
+                shutil.rmtree(self.path(product, part), ignore_errors=True)
+                (tmp / f"{part}.zarr").rename(self.path(product, part))
+            tmp.rmdir()
+
+            entry = {
+                "version": version,
+                "sources": checksums,
+                "options": options,
+                "variables": list(ds.data_vars),
+                "sizes": dict(ds.sizes),
+                "ingested": datetime.datetime.now().isoformat(timespec="seconds"),
+            }
+            with file_lock(self.manifest_path):
+                manifest = self.manifest
+                manifest[product] = entry
+                tmp_manifest = self.manifest_path.with_suffix(".tmp")
+                tmp_manifest.write_text(json.dumps(manifest, indent=2))
+                tmp_manifest.replace(self.manifest_path)
+        return entry
+
+    def _open(self, product, part):
+        if product not in self.manifest:
+            raise KeyError(f"Observation product '{product}' has not been ingested.")
+        # the time axis is kept as integer index, see bayes_climsim_eval.timeaxis
+        return xr.open_zarr(self.path(product, part), consolidated=True,
+                            decode_times=False)
+
+    def open(self, product: str, anomalies: bool = False,
+             masked: bool = False) -> xr.Dataset:
+        """Open a product lazily.
+
+        Parameters
+        ----------
+        anomalies : bool
+            Subtract the stored baseline climatology.
+        masked : bool
+            Set the grid cells outside the stored mask to NaN.
+        """
+        ds = self._open(product, "data")
+        if anomalies:
+            climatology = self.baseline(product).sel(month=_month_of_year(ds))
+            ds = ds - climatology.drop_vars("month")
+        if masked:
+            ds = ds.where(self.mask(product))
+        return ds
+
+    def baseline(self, product: str) -> xr.Dataset:
+        """Return the monthly climatology of the baseline period."""
+        return self._open(product, "baseline")
+
+    def mask(self, product: str) -> xr.Dataset:
+        """Return the mask of sufficiently observed grid cells."""
+        return self._open(product, "mask")
+
+    def verify(self, product: str) -> bool:
+        """Check that the source files of a product still match their checksums."""
+        sources = self.manifest[product]["sources"]
+        changed = [f for f, checksum in sources.items()
+                   if not Path(f).exists() or file_checksum(f) != checksum]
+        for f in changed:
+            log.warning("Source file %s of '%s' has changed since ingestion", f,
+                        product)
+        return not changed
@@ -0,0 +1,320 @@
+# %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+# Author: Markus Ritschel
+# eMail:  git@markusritschel.de
+# Date:   2026-10-19
+# %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+#
+"""Declarative evaluation pipelines with DAG scheduling and cached stage outputs.
+
+A pipeline is defined in a TOML file that lists its stages. Each stage names the
+function it ``uses`` (``"module:function"``), the outputs of other stages it takes as
+``inputs`` (a mapping of argument name to stage name) and further keyword ``params``.
+Files listed under ``watch`` invalidate the stage when they change::
+
+    [pipeline]
+    name = "tas_climwip"
+    workers = 4
+
+    [cluster]
+    n_workers = 16
+    memory_limit = "8GB"
+
+    [stages.load]
+    uses = "bayes_climsim_eval.timeaxis:open_harmonised"
+    params = { paths = "data/cmip6/tas_*.nc" }
+    watch = ["data/cmip6/tas_*.nc"]
+
+    [stages.distances]
+    uses = "bayes_climsim_eval.distances:pairwise_distances"
+    inputs = { field = "load" }
+    params = { metric = "rmse" }
+
+Each stage output is cached under a key derived from the stage definition, the source
+code of its function and the keys of its inputs. Stages whose key is found in the cache
+are skipped, independent branches of the DAG run concurrently.
+
+xarray outputs that are dask-backed or large are written chunk by chunk to a zarr store
+``<key>.zarr`` in the cache directory and re-opened lazily, so that downstream stages
+receive lazy objects and nothing has to fit into the memory of the driver process. These
+stores are not subject to the LRU eviction of the cache. All other outputs are pickled;
+an output that exceeds the maximum cache size raises an error.
+"""
+import glob
+import graphlib
+import importlib
+import logging
+import os
+import shutil
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import dask.array
+import xarray as xr
+from dask.base import is_dask_collection, tokenize
+
+from .core.memoize import DiskCache, source_hash
+
+if sys.version_info >= (3, 11):
+    import tomllib
+else:
+    import tomli as tomllib
+
+log = logging.getLogger(__name__)
+
+__all__ = ["Stage", "Pipeline", "load_pipeline", "has_output", "load_output",
+           "store_output"]
+
+#: numpy-backed xarray outputs larger than this (in bytes) are stored as zarr
+ZARR_THRESHOLD = 64 * 2**20
+_DATAARRAY_ATTR = "_pipeline_dataarray"
+_DASK_ARRAY_ATTR = "_pipeline_dask_array"
+_UNNAMED = "__data__"
+_MISSING = object()
+
+
+def _zarr_path(cache, key):
+    return cache.directory / f"{key}.zarr"
+
+
+def has_output(cache: DiskCache, key: str) -> bool:
+    """Whether the output of a stage with the given key is cached."""
+    return key in cache or _zarr_path(cache, key).exists()
+
+
+def _uniform_chunks(ds):
+    """Rechunk dask-backed variables to the uniform chunks required by zarr."""
+    for name, var in ds.variables.items():
+        var.encoding.clear()
+        if var.chunks is not None:
+            ds[name] = var.chunk({dim: chunks[0] for dim, chunks
+                                  in zip(var.dims, var.chunks, strict=True)})
+    return ds
+
+
+def store_output(cache: DiskCache, key: str, value):
+    """Store a stage output and return it as downstream stages will receive it."""
+    if isinstance(value, dask.array.Array):
+        value = xr.DataArray(value, dims=[f"dim_{i}" for i in range(value.ndim)],
+                             attrs={_DASK_ARRAY_ATTR: 1})
+    if isinstance(value, (xr.Dataset, xr.DataArray)) and (
+            value.chunks or value.nbytes > ZARR_THRESHOLD):
+        if isinstance(value, xr.DataArray):
+            name = _UNNAMED if value.name is None else value.name
+            value = value.to_dataset(name=name).assign_attrs({_DATAARRAY_ATTR: name})
+        path = _zarr_path(cache, key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}")
+        shutil.rmtree(tmp, ignore_errors=True)
+        _uniform_chunks(value.copy()).to_zarr(tmp, consolidated=True)
+        shutil.rmtree(path, ignore_errors=True)
+        os.replace(tmp, path)
+        return load_output(cache, key)
+    if is_dask_collection(value):
+        log.warning("Stage output '%s' cannot be stored lazily; it is computed and "
+                    "pickled", key)
+    return cache.set(key, value)
+
+
+def load_output(cache: DiskCache, key: str, default=None):
+    """Return a cached stage output (lazily for zarr stores), or `default` if absent."""
+    path = _zarr_path(cache, key)
+    if not path.exists():
+        return cache.get(key, default)
+    try:
+        ds = xr.open_zarr(path, consolidated=True)
+    except ValueError:
+        # e.g. integer time indices with units unknown to the CF decoder
+        ds = xr.open_zarr(path, consolidated=True, decode_times=False)
+    name = ds.attrs.pop(_DATAARRAY_ATTR, None)
+    if name is None:
+        return ds
+    da = ds[name]
+    if da.attrs.pop(_DASK_ARRAY_ATTR, None):
+        return da.data
+    return da.rename(None) if name == _UNNAMED else da
+
+
+@dataclass
+class Stage:
+    """A single stage of a :class:`Pipeline`."""
+
+    name: str
+    uses: str
+    inputs: dict = field(default_factory=dict)
+    params: dict = field(default_factory=dict)
+    watch: list = field(default_factory=list)
+
+    @property
+    def func(self):
+        """The function of the stage, imported from ``uses``."""
+        module, _, name = self.uses.partition(":")
+        return getattr(importlib.import_module(module), name)
+
+    def fingerprint(self) -> str:
+        """Hash of the stage definition, its function's source and the watched files."""
+        files = sorted(path for pattern in self.watch for path in glob.glob(pattern))
+        stats = [(path, os.stat(path).st_mtime_ns, os.stat(path).st_size)
+                 for path in files]
+        return tokenize(self.uses, source_hash(self.func), self.inputs, self.params,
+                        stats)
+
+
+class Pipeline:
+    """A directed acyclic graph of stages with cached outputs.
+
+    Parameters
+    ----------
+    stages : list of Stage
+        The stages of the pipeline.
+    name : str
+        The name of the pipeline.
+    cache : DiskCache, optional
+        The cache of the stage outputs. Defaults to ``DATA_DIR/cache/pipeline``.
+    workers : int
+        The maximum number of stages that run concurrently.
+    cluster : dict, optional
+        Options of the dask cluster, see
+        :func:`~bayes_climsim_eval.core.cluster.start_cluster`.
+    """
+
+    def __init__(self, stages: list[Stage], name: str = "pipeline",
+                 cache: DiskCache | None = None, workers: int = 1,
+                 cluster: dict | None = None):
+        self.stages = {stage.name: stage for stage in stages}
+        self.name = name
+        self.workers = workers
+        self.cluster = cluster or {}
+        if cache is None:
+            from . import DATA_DIR
+            cache = DiskCache(DATA_DIR / "cache" / "pipeline")
+        self.cache = cache
+        for stage in stages:
+            unknown = set(stage.inputs.values()) - set(self.stages)
+            if unknown:
+                raise ValueError(f"Stage '{stage.name}' depends on unknown stages "
+                                 f"{unknown}.")
+        self.graph = {name: set(stage.inputs.values())
+                      for name, stage in self.stages.items()}
+        # raises graphlib.CycleError for cyclic definitions
+        self.order = list(graphlib.TopologicalSorter(self.graph).static_order())
+
+    @classmethod
+    def from_toml(cls, path: str | Path, **kwargs) -> "Pipeline":
+        """Create a pipeline from a TOML definition (see module docstring)."""
+        with open(path, "rb") as f:
+            config = tomllib.load(f)
+        options = config.get("pipeline", {})
+        stages = [Stage(name=name, **definition)
+                  for name, definition in config.get("stages", {}).items()]
+        kwargs.setdefault("workers", options.get("workers", 1))
+        kwargs.setdefault("cluster", config.get("cluster", {}))
+        return cls(stages, name=options.get("name", Path(path).stem), **kwargs)
+
+    def ancestors(self, names) -> set:
+        """Return the given stages together with all stages they depend on."""
+        selected, todo = set(), list(names)
+        while todo:
+            name = todo.pop()
+            if name not in self.stages:
+                raise KeyError(f"Unknown stage '{name}'.")
+            if name not in selected:
+                selected.add(name)
+                todo.extend(self.graph[name])
+        return selected
+
+    def descendants(self, names) -> set:
+        """Return the given stages together with all stages depending on them."""
+        selected = set(names)
+        for name in self.order:
+            if self.graph[name] & selected:
+                selected.add(name)
+        return selected
+
+    def keys(self) -> dict:
+        """Return the cache keys of all stages (Merkle-style, including the inputs)."""
+        keys = {}
+        for name in self.order:
+            stage = self.stages[name]
+            upstream = {arg: keys[source] for arg, source in stage.inputs.items()}
+            keys[name] = f"{self.name}_{name}_{tokenize(stage.fingerprint(), upstream)}"
+        return keys
+
+    def plan(self, targets=None, force=()) -> dict:
+        """Return the stages of the subgraph with the status ``"cached"`` or ``"run"``.
+
+        Parameters
+        ----------
+        targets : list of str, optional
+            Only the targets and their ancestors are considered. Defaults to all stages.
+        force : list of str
+            Stages to be re-run regardless of the cache, together with their
+            descendants.
+        """
+        selected = self.ancestors(targets) if targets else set(self.stages)
+        forced = self.descendants(force) if force else set()
+        keys = self.keys()
+        return {name: "run" if name in forced or not has_output(self.cache, keys[name])
+                else "cached" for name in self.order if name in selected}
+
+    def run(self, targets=None, force=(), workers: int | None = None) -> dict:
+        """Run the (sub-)graph and return the outputs of `targets` (or final stages).
+
+        Stages are submitted to a thread pool as soon as all their inputs are available.
+        Outputs of cached stages are only loaded if a downstream stage needs to run or
+        if they are requested as target.
+        """
+        plan = self.plan(targets, force)
+        keys = self.keys()
+        results, lock = {}, threading.Lock()
+
+        def output(name):
+            with lock:
+                if name not in results:
+                    value = load_output(self.cache, keys[name], _MISSING)
+                    if value is _MISSING:
+                        raise KeyError(f"The output of stage '{name}' is not cached "
+                                       f"anymore; re-run it with force=['{name}'].")
+                    results[name] = value
+                return results[name]
+
+        def execute(name):
+            stage = self.stages[name]
+            args = {arg: output(source) for arg, source in stage.inputs.items()}
+            start = time.perf_counter()
+            log.info("Run stage '%s' (%s)", name, stage.uses)
+            value = stage.func(**args, **stage.params)
+            value = store_output(self.cache, keys[name], value)
+            log.info("Finished stage '%s' in %.1fs", name, time.perf_counter() - start)
+            with lock:
+                results[name] = value
+
+        sorter = graphlib.TopologicalSorter({name: self.graph[name] & set(plan)
+                                             for name in plan})
+        sorter.prepare()
+        with ThreadPoolExecutor(workers or self.workers) as pool:
+            running = {}
+            while sorter.is_active():
+                for name in sorter.get_ready():
+                    if plan[name] == "cached":
+                        log.info("Skip stage '%s' (up to date)", name)
+                        sorter.done(name)
+                    else:
+                        running[pool.submit(execute, name)] = name
+                if not running:
+                    continue
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    future.result()
+                    sorter.done(running.pop(future))
+        sinks = [name for name in plan
+                 if not any(name in self.graph[other] for other in plan)]
+        return {name: output(name) for name in (targets or sinks)}
+
+
+def load_pipeline(path: str | Path, **kwargs) -> Pipeline:
+    """Shortcut for :meth:`Pipeline.from_toml`."""
+    return Pipeline.from_toml(path, **kwargs)
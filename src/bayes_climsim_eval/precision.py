@@ -0,0 +1,230 @@
+# %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+# Author: Markus Ritschel
+# eMail:  git@markusritschel.de
+# Date:   2026-10-19
+# %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+#
+"""Reduced-precision representation of ensemble fields.
+
+Fields are kept as ``float32`` or as ``int16`` with ``scale_factor`` and ``add_offset``
+attributes (CF packing) through loading and preprocessing. They are promoted back to
+``float64`` only chunk-wise inside the accumulators of the reduction kernels, see
+:func:`promote`. :func:`precision_impact` reports the effect of a precision policy on
+the final model weights.
+"""
+import logging
+
+import dask
+import numpy as np
+import xarray as xr
+
+log = logging.getLogger(__name__)
+
+__all__ = ["apply_precision", "promote", "unpack", "valid", "precision_impact"]
+
+PRECISIONS = ("float64", "float32", "int16")
+INT16_FILL = np.int16(-32768)
+#: weight differences are taken relative to at least this fraction of the largest weight
+REL_DIFFERENCE_FLOOR = 1e-3
+
+
+def _is_packed(da):
+    return np.issubdtype(da.dtype, np.integer) and "scale_factor" in da.attrs
+
+
+def _packing(lo, hi):
+    """Return the scale factor and offset mapping [lo, hi] onto [-32767, 32767]."""
+    scale = (hi - lo) / (2 * 32767) if hi > lo else 1.0
+    return scale, (hi + lo) / 2
+
+
+def _encoded_packing(da):
+    """Return the scale factor and offset of data stored as CF-packed int16, if any."""
+    encoding = da.encoding
+    if "scale_factor" in encoding and np.dtype(encoding.get("dtype", "f8")) == np.int16:
+        return float(encoding["scale_factor"]), float(encoding.get("add_offset", 0.0))
+    return None
+
+
+def _int16_packing(fields, valid_range=None):
+    """Return the scale factor and offset of each field.
+
+    They are derived from the `valid_range` (a ``(min, max)`` tuple or a mapping of
+    names to such tuples), else taken from the CF encoding on disk. The value ranges of
+    all other fields are computed together in a single :func:`dask.compute`.
+    """
+    packing, ranges = {}, {}
+    for name, da in fields.items():
+        bounds = valid_range.get(name) if isinstance(valid_range, dict) else valid_range
+        if bounds is not None:
+            packing[name] = _packing(*map(float, bounds))
+        elif (encoded := _encoded_packing(da)) is not None:
+            packing[name] = encoded
+        else:
+            ranges[name] = (da.min(), da.max())
+    if ranges:
+        log.debug("Compute the value ranges of %s for the int16 packing", list(ranges))
+        (ranges,) = dask.compute(ranges)
+        packing.update({name: _packing(float(lo), float(hi))
+                        for name, (lo, hi) in ranges.items()})
+    return packing
+
+
+def _pack_int16(da, scale, offset):
+    """Linearly pack a float array into int16, reserving -32768 for missing values.
+
+    Values outside the range covered by `scale` and `offset` are clipped.
+    """
+    packed = ((da - offset) / scale).round().clip(-32767, 32767)
+    packed = packed.fillna(INT16_FILL).astype(np.int16)
+    packed.attrs = dict(da.attrs, scale_factor=scale, add_offset=offset,
+                        missing_value=INT16_FILL)
+    return packed
+
+
+def apply_precision(obj: xr.Dataset | xr.DataArray, precision: str = "float32",
+                    variables: list | None = None,
+                    valid_range: tuple | dict | None = None,
+                    ) -> xr.Dataset | xr.DataArray:
+    """Convert floating-point fields to the given precision (lazily for dask data).
+
+    Parameters
+    ----------
+    obj : xr.Dataset | xr.DataArray
+        The data, e.g. right after loading.
+    precision : str
+        ``"float64"`` (no change), ``"float32"`` or ``"int16"`` (packed with a
+        per-variable scale factor and offset; the maximum error is half the scale
+        factor).
+    variables : list, optional
+        The data variables of a dataset to convert. Defaults to all floating-point
+        variables.
+    valid_range : tuple | dict, optional
+        For ``"int16"``: the ``(min, max)`` range to be packed, or a mapping of variable
+        names to such ranges. Values outside are clipped.
+
+    Notes
+    -----
+    The int16 packing needs the value range of each variable. It is taken from
+    `valid_range` or else reused from the CF packing (``scale_factor`` and
+    ``add_offset`` of an int16 variable on disk). Otherwise the minimum and maximum of
+    all remaining variables are computed eagerly, in one pass over the data, before the
+    (lazy) packing.
+
+    Example
+    -------
+    >>> da = xr.DataArray([273.15, 288.2, np.nan])
+    >>> packed = apply_precision(da, "int16")
+    >>> packed.dtype, np.abs(promote(packed) - da).max().item() < packed.scale_factor
+    (dtype('int16'), True)
+    """
+    if precision not in PRECISIONS:
+        raise ValueError(f"Unknown precision '{precision}'. "
+                         f"Choose one of {PRECISIONS}.")
+    if isinstance(obj, xr.Dataset):
+        names = variables or [name for name, var in obj.data_vars.items()
+                              if np.issubdtype(var.dtype, np.floating)]
+        if precision != "int16":
+            return obj.assign({name: apply_precision(obj[name], precision)
+                               for name in names})
+        fields = {name: obj[name] for name in names
+                  if np.issubdtype(obj[name].dtype, np.floating)}
+        packing = _int16_packing(fields, valid_range)
+        log.debug("Pack %s to int16", list(fields))
+        return obj.assign({name: _pack_int16(da, *packing[name])
+                           for name, da in fields.items()})
+    if precision == "float64" or not np.issubdtype(obj.dtype, np.floating):
+        return obj
+    log.debug("Convert %s from %s to %s", obj.name, obj.dtype, precision)
+    if precision == "float32":
+        return obj.astype(np.float32, keep_attrs=True)
+    return _pack_int16(obj, *_int16_packing({obj.name: obj}, valid_range)[obj.name])
+
+
+def promote(da: xr.DataArray, dtype=np.float64) -> xr.DataArray:
+    """Return the data as `dtype`, unpacking int16 data and masking missing values.
+
+    Call this on (chunks of) the data inside the accumulating kernels; for dask-backed
+    data the conversion happens chunk by chunk.
+    """
+    if _is_packed(da):
+        fill = da.attrs.get("missing_value", INT16_FILL)
+        values = da.astype(dtype) * dtype(da.attrs["scale_factor"]) + dtype(
+            da.attrs.get("add_offset", 0))
+        attrs = {k: v for k, v in da.attrs.items()
+                 if k not in ("scale_factor", "add_offset", "missing_value")}
+        return values.where(da != fill).assign_attrs(attrs)
+    return da.astype(dtype, copy=False, keep_attrs=True)
+
+
+def unpack(da: xr.DataArray) -> xr.DataArray:
+    """Unpack int16 data to float32, e.g. before combining differently packed arrays.
+
+    Other data are returned unchanged.
+    """
+    return promote(da, np.float32) if _is_packed(da) else da
+
+
+def valid(da: xr.DataArray) -> xr.DataArray:
+    """Return a mask of the valid (non-missing) values, also for packed int16 data."""
+    if _is_packed(da):
+        return da != da.attrs.get("missing_value", INT16_FILL)
+    return da.notnull()
+
+
+def _rank(da, dim):
+    return xr.apply_ufunc(lambda x: np.argsort(np.argsort(x, axis=-1), axis=-1), da,
+                          input_core_dims=[[dim]], output_core_dims=[[dim]])
+
+
+def precision_impact(field: xr.DataArray, obs: xr.DataArray, sigma_d: float,
+                     sigma_s: float, precision: str = "float32",
+                     weights: xr.DataArray | None = None, metric: str = "rmse",
+                     dim: str = "model") -> xr.Dataset:
+    """Compare the model weights obtained at full and at reduced precision.
+
+    Parameters
+    ----------
+    field, obs : xr.DataArray
+        The model fields and the observations, as for
+        :func:`~bayes_climsim_eval.distances.pairwise_distances`.
+    sigma_d, sigma_s : float
+        The performance and similarity radii.
+    precision : str
+        The reduced precision to be tested, see :func:`apply_precision`.
+
+    Returns
+    -------
+    xr.Dataset
+        The ``reference`` and ``reduced`` weights, their ``max_abs_difference``, the
+        ``max_rel_difference``, the number of models whose weight ``rank_changes`` and
+        the ``memory_ratio`` of the reduced field. The relative differences of weights
+        below a thousandth of the largest weight are taken relative to that floor.
+    """
+    from .distances import observation_distances, pairwise_distances
+    from .weighting import climwip_weights
+
+    def model_weights(f, o):
+        options = {"metric": metric, "dim": dim}
+        return climwip_weights(observation_distances(f, o, weights, **options),
+                               pairwise_distances(f, weights, **options),
+                               sigma_d, sigma_s, dim=dim)
+
+    reference = model_weights(promote(field), promote(obs))
+    reduced_field = apply_precision(field, precision)
+    reduced = model_weights(reduced_field, apply_precision(obs, precision))
+    difference = np.abs(reduced - reference)
+    floor = REL_DIFFERENCE_FLOOR * np.abs(reference).max(dim)
+    relative = difference / np.maximum(np.abs(reference), floor)
+    ranks = (_rank(reference, dim) != _rank(reduced, dim)).sum(dim)
+    result = xr.Dataset({
+        "reference": reference,
+        "reduced": reduced,
+        "max_abs_difference": difference.max(dim),
+        "max_rel_difference": relative.max(dim),
+        "rank_changes": ranks,
+        "memory_ratio": reduced_field.nbytes / (field.size * 8),
+    }, attrs={"precision": precision})
+    log.info("Precision %s changes the weights by at most %.2e (%d rank changes)",
+             precision, float(result.max_abs_difference.max()), int(ranks.max()))
+    return result
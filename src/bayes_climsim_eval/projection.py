@@ -0,0 +1,173 @@
+# %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+# Author: Markus Ritschel
+# eMail:  git@markusritschel.de
+# Date:   2026-10-19
+# %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+#
+"""Weighted ensemble statistics of future projections.
+
+All statistics are computed lazily on dask-backed data, chunk by chunk over the grid.
+Weighted quantiles are either computed exactly by sorting the (small) model dimension
+within each chunk, or approximated from weighted histograms that are accumulated over
+chunks of the sample dimension(s). The latter allows pooling large samples (e.g. models
+x members x years) with a quantile error bounded by the bin width.
+"""
+import logging
+
+import dask
+import dask.array
+import numpy as np
+import xarray as xr
+
+from .core.utils import save
+from .precision import unpack
+
+log = logging.getLogger(__name__)
+
+__all__ = ["weighted_mean", "weighted_variance", "weighted_quantile",
+           "projection_statistics", "save_projection"]
+
+QUANTILE_METHODS = ("sort", "histogram")
+
+
+def weighted_mean(da: xr.DataArray, weights: xr.DataArray,
+                  dim: str | list = "model") -> xr.DataArray:
+    """Return the weighted ensemble mean along `dim`."""
+    return da.weighted(weights).mean(dim)
+
+
+def weighted_variance(da: xr.DataArray, weights: xr.DataArray,
+                      dim: str | list = "model") -> xr.DataArray:
+    """Return the weighted ensemble variance along `dim` (normalised by the weights)."""
+    return da.weighted(weights).var(dim)
+
+
+def _block_histogram(x, w, edges):
+    """Weighted histograms along the last axis of a (cells, samples) block.
+
+    Returns an array of shape (cells, 1, bins) to be summed over the sample blocks.
+    """
+    nbins = len(edges) - 1
+    cells = x.shape[0]
+    valid = np.isfinite(x) & np.isfinite(w)
+    index = np.clip(np.searchsorted(edges, x, side="right") - 1, 0, nbins - 1)
+    flat = (np.arange(cells)[:, None] * nbins + index)[valid]
+    hist = np.bincount(flat, weights=w[valid], minlength=cells * nbins)
+    return hist.reshape(cells, 1, nbins)
+
+
+def _histogram_quantiles(hist, edges, q):
+    """Interpolate the quantiles `q` linearly within the bins of the histograms."""
+    cdf = np.cumsum(hist, axis=-1)
+    total = cdf[..., -1:]
+    target = np.asarray(q)[:, None] * total[..., 0][None]          # (q, cells)
+    cdf = np.moveaxis(cdf, -1, 0)                                  # (bins, cells)
+    hist = np.moveaxis(hist, -1, 0)
+    b = np.argmax(cdf[None] >= target[:, None], axis=1)            # (q, cells)
+    below = np.where(b > 0, np.take_along_axis(cdf, np.maximum(b - 1, 0), axis=0), 0)
+    count = np.take_along_axis(hist, b, axis=0)
+    fraction = np.divide(target - below, count, out=np.full(target.shape, 0.5),
+                         where=count > 0)
+    result = edges[b] + np.clip(fraction, 0, 1) * (edges[1] - edges[0])
+    return np.where(total[..., 0][None] > 0, result, np.nan)
+
+
+def _histogram_quantile(da, weights, q, dims, bins, value_range):
+    """Approximate weighted quantiles from histograms accumulated over sample chunks."""
+    stacked = da.stack(_sample=dims).transpose(..., "_sample")
+    w = weights.broadcast_like(da).stack(_sample=dims).transpose(*stacked.dims)
+    x, w = dask.array.asarray(stacked.data), dask.array.asarray(w.data)
+    w = w.rechunk(x.chunks)
+    if value_range is None:
+        value_range = dask.compute(dask.array.nanmin(x), dask.array.nanmax(x))
+    lo, hi = (float(v) for v in value_range)
+    edges = np.linspace(lo, hi if hi > lo else lo + 1, bins + 1)
+
+    cells = x.shape[:-1]
+    x2 = x.reshape((-1, x.shape[-1]))
+    w2 = w.reshape((-1, w.shape[-1])).rechunk(x2.chunks)
+    hist = dask.array.map_blocks(
+        _block_histogram, x2, w2, edges, dtype=np.float64,
+        chunks=(x2.chunks[0], (1,) * len(x2.chunks[1]), (bins,)), new_axis=2,
+    ).sum(axis=1)
+    quantiles = hist.map_blocks(lambda h: _histogram_quantiles(h, edges, q).T,
+                                chunks=(hist.chunks[0], (len(q),)), dtype=np.float64)
+    quantiles = quantiles.reshape(cells + (len(q),))
+
+    result = xr.DataArray(quantiles, dims=stacked.dims[:-1] + ("quantile",),
+                          coords={name: coord for name, coord in stacked.coords.items()
+                                  if "_sample" not in coord.dims and name != "_sample"})
+    result = result.assign_coords(quantile=list(q)).transpose("quantile", ...)
+    result.attrs["max_abs_error"] = edges[1] - edges[0]
+    return result
+
+
+def weighted_quantile(da: xr.DataArray, weights: xr.DataArray, q,
+                      dim: str | list = "model", method: str = "sort", bins: int = 1000,
+                      value_range: tuple | None = None) -> xr.DataArray:
+    """Return weighted quantiles along `dim`.
+
+    Parameters
+    ----------
+    da : xr.DataArray
+        The (dask-backed) projections.
+    weights : xr.DataArray
+        The weights, broadcastable against `da`.
+    q : float | list
+        The quantile(s) in [0, 1].
+    dim : str | list
+        The sample dimension(s), e.g. ``"model"`` or ``["model", "member"]``.
+    method : str
+        ``"sort"`` computes exact quantiles (linear interpolation of the weighted
+        empirical distribution) by sorting `dim` within each grid chunk. ``"histogram"``
+        accumulates weighted histograms over chunks of `dim`; it differs from the
+        weighted inverse distribution function (the smallest value whose cumulative
+        weight reaches `q`) by at most the bin width, which is stored in the attribute
+        ``max_abs_error``.
+    bins : int
+        The number of histogram bins.
+    value_range : tuple, optional
+        The (min, max) range of the histogram. Computed from the data if not given.
+    """
+    if method not in QUANTILE_METHODS:
+        raise ValueError(f"Unknown method '{method}'. "
+                         f"Choose one of {QUANTILE_METHODS}.")
+    dims = [dim] if isinstance(dim, str) else list(dim)
+    if method == "sort":
+        if da.chunks is not None:
+            da = da.chunk({d: -1 for d in dims})
+        result = da.weighted(weights).quantile(q, dim=dims)
+    else:
+        result = _histogram_quantile(da, weights, np.atleast_1d(q).astype(np.float64),
+                                     dims, bins, value_range)
+        if np.ndim(q) == 0:
+            result = result.squeeze("quantile")
+    return result.drop_vars("quantile") if np.ndim(q) == 0 else result
+
+
+def projection_statistics(da: xr.DataArray, weights: xr.DataArray,
+                          dim: str | list = "model",
+                          quantiles=(0.05, 0.17, 0.5, 0.83, 0.95),
+                          method: str = "sort", **kwargs) -> xr.Dataset:
+    """Return the weighted mean, standard deviation and quantiles of the projections.
+
+    Further keyword arguments are passed to :func:`weighted_quantile`. The result is
+    lazy for dask-backed input. Packed int16 projections are unpacked chunk-wise.
+    """
+    da = unpack(da)
+    stats = xr.Dataset({
+        "mean": weighted_mean(da, weights, dim),
+        "std": np.sqrt(weighted_variance(da, weights, dim)),
+        "quantiles": weighted_quantile(da, weights, list(quantiles), dim=dim,
+                                       method=method, **kwargs),
+    })
+    stats.attrs.update({"weighted_over": str(dim), "quantile_method": method})
+    return stats
+
+
+def save_projection(stats: xr.Dataset, path, complevel: int = 4, **kwargs):
+    """Compute and write the projection statistics as compressed netCDF.
+
+    The file is written via :func:`~bayes_climsim_eval.save`.
+    """
+    return save(stats, path, complevel=complevel, **kwargs)
@@ -0,0 +1,245 @@
+# %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+# Author: Markus Ritschel
+# eMail:  git@markusritschel.de
+# Date:   2026-10-19
+# %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+#
+"""Incremental, parallel figure builds for the Jupyter-Book report.
+
+The figures of the report are declared in a TOML file. Each figure names the plotting
+function it ``uses`` (``"module:function"``, returning a
+:class:`matplotlib.figure.Figure`), the cached outputs of the evaluation pipeline it
+takes as ``inputs`` (a mapping of argument name to stage name), further ``params``, the
+matplotlib ``style`` and the ``filename`` below ``PLOT_DIR``::
+
+    [report]
+    pipeline = "pipelines/tas_climwip.toml"
+    book = "reports/book"
+    workers = 8
+
+    [figures.weights]
+    uses = "bayes_climsim_eval.plots:weights_bar"
+    inputs = { weights = "climwip" }
+    style = "white_paper"
+    filename = "weights.png"
+
+A figure is stale if its file is missing or if the key derived from its definition, the
+source code of its function and the cache keys of its input stages has changed since it
+was rendered. Only stale figures are rendered (in parallel worker processes) before the
+book is assembled with ``jupyter-book build``; the book itself does not execute
+notebooks. The worker processes are spawned rather than forked: a forked copy of a live
+dask client cannot compute, so lazy inputs would never be loaded.
+"""
+import json
+import logging
+import multiprocessing
+import shutil
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+
+from dask.base import tokenize
+
+from .core.memoize import DiskCache, source_hash
+from .pipeline import Pipeline, Stage, load_output
+
+if sys.version_info >= (3, 11):
+    import tomllib
+else:
+    import tomli as tomllib
+
+log = logging.getLogger(__name__)
+
+__all__ = ["FigureSpec", "Report", "load_report"]
+
+
+@dataclass
+class FigureSpec:
+    """A figure of a :class:`Report`."""
+
+    name: str
+    uses: str
+    filename: str
+    inputs: dict = field(default_factory=dict)
+    params: dict = field(default_factory=dict)
+    style: str | None = None
+
+    @property
+    def func(self):
+        """The plotting function, imported from ``uses``."""
+        return Stage(self.name, self.uses).func
+
+
+_MISSING = object()
+
+
+def _render(spec: dict, cache_dir: str, input_keys: dict, path: str):
+    """Render and save a single figure (run in a worker process).
+
+    `input_keys` maps each argument to the name and the cache key of its stage.
+    """
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    from .core.utils import mpl_style, save
+
+    spec = FigureSpec(**spec)
+    cache = DiskCache(cache_dir)
+    inputs = {}
+    for arg, (stage, key) in input_keys.items():
+        inputs[arg] = load_output(cache, key, _MISSING)
+        if inputs[arg] is _MISSING:
+            raise KeyError(f"Figure '{spec.name}' needs the output of stage '{stage}', "
+                           f"which is not cached; run the pipeline stage '{stage}' "
+                           "first.")
+    styles = [mpl_style(spec.style)] if spec.style else []
+    with plt.style.context(styles):
+        fig = spec.func(**inputs, **spec.params)
+        save(fig, path, add_hash=False)
+    plt.close(fig)
+    return path
+
+
+class Report:
+    """The figures of the report and the pipeline whose cached results they show.
+
+    Parameters
+    ----------
+    figures : list of FigureSpec
+        The figures of the report.
+    pipeline : Pipeline
+        The evaluation pipeline providing the inputs of the figures.
+    book : str | Path, optional
+        The Jupyter-Book directory. Defaults to ``reports/book``.
+    plot_dir : str | Path, optional
+        The directory of the figures. Defaults to ``PLOT_DIR``.
+    workers : int
+        The number of worker processes rendering figures.
+    """
+
+    def __init__(self, figures: list[FigureSpec], pipeline: Pipeline,
+                 book: str | Path | None = None, plot_dir: str | Path | None = None,
+                 workers: int = 1):
+        from . import BASE_DIR, PLOT_DIR
+
+        self.figures = {spec.name: spec for spec in figures}
+        self.pipeline = pipeline
+        self.book = Path(book) if book is not None else BASE_DIR / "reports" / "book"
+        self.plot_dir = Path(plot_dir) if plot_dir is not None else PLOT_DIR
+        self.workers = workers
+        self.manifest_path = self.plot_dir / ".report.json"
+        for spec in figures:
+            unknown = set(spec.inputs.values()) - set(pipeline.stages)
+            if unknown:
+                raise ValueError(f"Figure '{spec.name}' depends on unknown stages "
+                                 f"{unknown}.")
+
+    @classmethod
+    def from_toml(cls, path: str | Path, pipeline: Pipeline | None = None,
+                  **kwargs) -> "Report":
+        """Create a report from a TOML definition (see module docstring).
+
+        Relative paths of the pipeline and the book are relative to the TOML file.
+        """
+        path = Path(path)
+        with open(path, "rb") as f:
+            config = tomllib.load(f)
+        options = config.get("report", {})
+        if pipeline is None:
+            pipeline = Pipeline.from_toml(path.parent / options["pipeline"])
+        if "book" in options:
+            kwargs.setdefault("book", path.parent / options["book"])
+        kwargs.setdefault("workers", options.get("workers", 1))
+        figures = [FigureSpec(name=name, **definition)
+                   for name, definition in config.get("figures", {}).items()]
+        return cls(figures, pipeline, **kwargs)
+
+    @property
+    def manifest(self) -> dict:
+        """The keys of the figures at the time they were rendered."""
+        if not self.manifest_path.exists():
+            return {}
+        return json.loads(self.manifest_path.read_text())
+
+    def keys(self) -> dict:
+        """Return the keys of all figures, including the cache keys of their inputs."""
+        stage_keys = self.pipeline.keys()
+        return {name: tokenize(asdict(spec), source_hash(spec.func),
+                               {arg: stage_keys[stage]
+                                for arg, stage in spec.inputs.items()})
+                for name, spec in self.figures.items()}
+
+    def plan(self, figures=None, force: bool = False) -> dict:
+        """Return the selected figures with the status ``"render"`` or ``"current"``."""
+        selected = figures or list(self.figures)
+        unknown = set(selected) - set(self.figures)
+        if unknown:
+            raise KeyError(f"Unknown figures {unknown}.")
+        keys, manifest = self.keys(), self.manifest
+        return {name: "render" if force or manifest.get(name) != keys[name]
+                or not (self.plot_dir / self.figures[name].filename).exists()
+                else "current" for name in selected}
+
+    def stages(self, figures=None, force: bool = False) -> list:
+        """Return the pipeline stages whose outputs the stale figures need."""
+        return sorted({stage for name, status in self.plan(figures, force).items()
+                       if status == "render"
+                       for stage in self.figures[name].inputs.values()})
+
+    def build(self, figures=None, force: bool = False,
+              workers: int | None = None) -> dict:
+        """Render the stale figures in parallel and return the plan that was executed.
+
+        Pipeline stages needed by the stale figures are run first if they are not
+        cached.
+        """
+        stages = self.stages(figures, force)
+        if stages and "run" in self.pipeline.plan(stages).values():
+            self.pipeline.run(stages)
+        plan = self.plan(figures, force)
+        stale = [name for name, status in plan.items() if status == "render"]
+        keys, stage_keys = self.keys(), self.pipeline.keys()
+        self.plot_dir.mkdir(parents=True, exist_ok=True)
+
+        start = time.perf_counter()
+        spawn = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(workers or self.workers, mp_context=spawn) as pool:
+            futures = {}
+            for name in stale:
+                spec = self.figures[name]
+                input_keys = {arg: (stage, stage_keys[stage])
+                              for arg, stage in spec.inputs.items()}
+                path = self.plot_dir / spec.filename
+                path.parent.mkdir(parents=True, exist_ok=True)
+                cache_dir = str(self.pipeline.cache.directory)
+                futures[pool.submit(_render, asdict(spec), cache_dir, input_keys,
+                                    str(path))] = name
+            for future in as_completed(futures):
+                name = futures[future]
+                future.result()
+                log.info("Rendered figure '%s'", name)
+                manifest = self.manifest
+                manifest[name] = keys[name]
+                self.manifest_path.write_text(json.dumps(manifest, indent=2))
+        log.info("Rendered %d of %d figures in %.1fs", len(stale), len(plan),
+                 time.perf_counter() - start)
+        return plan
+
+    def build_book(self, builder: str = "html"):
+        """Assemble the Jupyter-Book (without executing notebooks)."""
+        executable = shutil.which("jupyter-book") or shutil.which("jb")
+        if executable is None:
+            raise RuntimeError("Building the book requires `jupyter-book` to be "
+                               "installed.")
+        log.info("Build %s book in %s", builder, self.book)
+        subprocess.run([executable, "build", str(self.book), "--builder", builder],
+                       check=True)
+
+
+def load_report(path: str | Path, **kwargs) -> Report:
+    """Shortcut for :meth:`Report.from_toml`."""
+    return Report.from_toml(path, **kwargs)
@@ -0,0 +1,322 @@
+# %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+# Author: Markus Ritschel
+# eMail:  git@markusritschel.de
+# Date:   2026-10-19
+# %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+#
+"""Scaling study of the evaluation on synthetic ensembles.
+
+The benchmark workload reads an ensemble of synthetic model files and observations with
+:func:`~bayes_climsim_eval.timeaxis.open_harmonised`, computes the pairwise and
+observational distances and the ClimWIP weights. It is timed
+
+- for *strong scaling*: a fixed problem on an increasing number of workers,
+- for *weak scaling*: the number of models growing proportionally with the workers,
+- for *data size*: all combinations of ensemble sizes and grid resolutions.
+
+Each run records the wall time, the throughput, the peak memory and the I/O volume of
+the process tree (incl. the workers of a local cluster), the volume of the input files
+and the parallel efficiency. Everything runs locally, either on the threaded scheduler
+or on a local dask cluster.
+"""
+import contextlib
+import logging
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import dask
+import numpy as np
+import pandas as pd
+import psutil
+import xarray as xr
+
+from .core.cluster import compute_cluster
+from .core.utils import mpl_style, save
+
+log = logging.getLogger(__name__)
+
+__all__ = ["synthetic_files", "scaling_study", "plot_scaling", "save_scaling_report"]
+
+
+def _grid(resolution):
+    lat = np.arange(-90 + resolution / 2, 90, resolution)
+    lon = np.arange(0, 360, resolution)
+    return lat, lon
+
+
+def _synthetic_field(seed, resolution, n_time, bias):
+    rng = np.random.default_rng(seed)
+    lat, lon = _grid(resolution)
+    days = np.arange(n_time) * 365 / 12 + 15
+    pattern = 30 * np.cos(np.deg2rad(lat))[:, None] + 2 * np.sin(np.deg2rad(lon))[None]
+    cycle = 5 * np.sin(2 * np.pi * np.arange(n_time) / 12)[:, None, None]
+    noise = rng.normal(size=(n_time, lat.size, lon.size))
+    tas = (250 + bias + pattern + cycle + noise).astype(np.float32)
+    time_coord = xr.DataArray(days, dims="time",
+                              attrs={"units": "days since 1850-01-01",
+                                     "calendar": "noleap"})
+    return xr.Dataset({"tas": (("time", "lat", "lon"), tas)},
+                      coords={"time": time_coord, "lat": lat, "lon": lon})
+
+
+def synthetic_files(directory: str | Path, n_models: int, resolution: float,
+                    n_time: int = 120) -> tuple[list[Path], Path]:
+    """Write (or reuse) synthetic model and observation files of a grid resolution.
+
+    Returns
+    -------
+    tuple
+        The paths of the model files and of the observation file.
+    """
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    paths = []
+    for i in range(n_models + 1):
+        name = "obs" if i == n_models else f"model{i:03d}"
+        path = directory / f"{name}_{resolution:g}deg_{n_time}.nc"
+        if not path.exists():
+            bias = 0.0 if name == "obs" else np.random.default_rng(i).normal(scale=2)
+            _synthetic_field(1000 + i if name != "obs" else 0, resolution, n_time,
+                             bias).to_netcdf(path)
+        paths.append(path)
+    return paths[:-1], paths[-1]
+
+
+def evaluate(model_paths, obs_path, time_chunk: int = 60) -> xr.DataArray:
+    """Load the ensemble and compute the ClimWIP weights (the benchmark workload)."""
+    from .distances import observation_distances, pairwise_distances
+    from .timeaxis import open_harmonised
+    from .weighting import climwip_weights
+
+    field = open_harmonised(model_paths, combine="nested", concat_dim="model",
+                            chunks={"time": time_chunk}).tas
+    field = field.assign_coords(model=[Path(p).stem.split("_")[0] for p in model_paths])
+    obs = open_harmonised(obs_path, chunks={"time": time_chunk}).tas
+    weights = np.cos(np.deg2rad(field.lat))
+    model_distances = pairwise_distances(field, weights, time_chunk=time_chunk)
+    obs_distances = observation_distances(field, obs, weights, time_chunk=time_chunk)
+    sigma = float(model_distances.median())
+    return climwip_weights(obs_distances, model_distances, sigma_d=sigma, sigma_s=sigma)
+
+
+class PeakMemory:
+    """Context manager sampling the resident memory of this process and its children."""
+
+    def __init__(self, interval: float = 0.05):
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+
+    def _rss(self):
+        process = psutil.Process()
+        total = process.memory_info().rss
+        for child in process.children(recursive=True):
+            with contextlib.suppress(psutil.Error):
+                total += child.memory_info().rss
+        return total
+
+    def _sample(self):
+        while not self._stop.is_set():
+            self.peak = max(self.peak, self._rss())
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, self._rss())
+
+
+class IOVolume:
+    """Context manager measuring the bytes read and written by this process tree.
+
+    The volume is the difference of the psutil I/O counters of this process and its
+    children (e.g. the workers of a local cluster) between entering and leaving. On
+    Linux, these count all bytes passed to read and write calls, including reads served
+    from the page cache. ``volume`` is NaN on platforms without I/O counters.
+    """
+
+    def __init__(self):
+        self.volume = np.nan
+
+    def _counters(self):
+        process = psutil.Process()
+        counters = {}
+        for p in [process, *process.children(recursive=True)]:
+            with contextlib.suppress(psutil.Error):
+                io = p.io_counters()
+                counters[p.pid] = (getattr(io, "read_chars", io.read_bytes)
+                                   + getattr(io, "write_chars", io.write_bytes))
+        return counters
+
+    def __enter__(self):
+        if hasattr(psutil.Process, "io_counters"):
+            self._start = self._counters()
+        return self
+
+    def __exit__(self, *exc):
+        if hasattr(psutil.Process, "io_counters"):
+            self.volume = sum(value - self._start.get(pid, 0)
+                              for pid, value in self._counters().items())
+
+
+@contextlib.contextmanager
+def _scheduler(workers, cluster, spill_dir, threads_per_worker=1, memory_limit=None):
+    """Run the enclosed computations with `workers` local workers."""
+    if cluster:
+        with compute_cluster(n_workers=workers, threads_per_worker=threads_per_worker,
+                             memory_limit=memory_limit, adaptive=False,
+                             dashboard_address=":0", spill_dir=spill_dir):
+            yield
+    else:
+        with dask.config.set(scheduler="threads", num_workers=workers):
+            yield
+
+
+def _run(kind, n_models, resolution, workers, directory, n_time, repeats, cluster,
+         **cluster_options):
+    model_paths, obs_path = synthetic_files(directory, n_models, resolution, n_time)
+    input_bytes = sum(Path(p).stat().st_size for p in model_paths + [obs_path])
+    with _scheduler(workers, cluster, Path(directory) / "dask-worker-space",
+                    **cluster_options):
+        seconds = []
+        with PeakMemory() as memory, IOVolume() as io:
+            for _ in range(repeats):
+                start = time.perf_counter()
+                evaluate(model_paths, obs_path)
+                seconds.append(time.perf_counter() - start)
+    lat, lon = _grid(resolution)
+    record = {"kind": kind, "n_models": n_models, "resolution": resolution,
+              "n_cells": lat.size * lon.size, "workers": workers,
+              "seconds": min(seconds), "input_mb": input_bytes / 2 ** 20,
+              "io_mb": io.volume / repeats / 2 ** 20,
+              "peak_memory_mb": memory.peak / 2 ** 20}
+    record["throughput_mb_s"] = record["input_mb"] / record["seconds"]
+    log.info("%s scaling: %d models at %g deg on %d workers took %.2fs", kind, n_models,
+             resolution, workers, record["seconds"])
+    return record
+
+
+def scaling_study(models=(5, 10, 20), resolutions=(5.0, 2.5), workers=(1, 2, 4),
+                  n_time: int = 120, repeats: int = 1, cluster: bool = False,
+                  directory: str | Path | None = None, threads_per_worker: int = 1,
+                  memory_limit: str | int | None = None) -> pd.DataFrame:
+    """Run the strong-scaling, weak-scaling and data-size benchmarks.
+
+    Parameters
+    ----------
+    models : sequence of int
+        The ensemble sizes of the data-size benchmark. The smallest one is the base size
+        of the strong and weak scaling benchmarks (the latter uses ``models[0] *
+        workers``).
+    resolutions : sequence of float
+        The grid resolutions (in degrees) of the data-size benchmark. The coarsest one
+        is used for the strong and weak scaling benchmarks.
+    workers : sequence of int
+        The numbers of workers. The data-size benchmark uses the largest one.
+    n_time : int
+        The number of monthly time steps of the synthetic data.
+    repeats : int
+        The number of repetitions of each run, of which the fastest is recorded.
+    cluster : bool
+        Use a local dask cluster with one worker process per worker instead of the
+        threaded scheduler.
+    directory : str | Path, optional
+        The directory for the synthetic files. Defaults to a temporary directory.
+    threads_per_worker : int
+        The threads per worker process of the cluster.
+    memory_limit : str | int, optional
+        The memory limit per worker process of the cluster, see
+        :func:`~bayes_climsim_eval.core.cluster.cluster_config`.
+
+    Returns
+    -------
+    pd.DataFrame
+        One row per run with the columns ``kind`` (strong, weak or size), ``n_models``,
+        ``resolution``, ``n_cells``, ``workers``, ``seconds``, ``input_mb`` (the size of
+        the input files), ``io_mb`` (the measured I/O volume per repetition, see
+        :class:`IOVolume`), ``peak_memory_mb``, ``throughput_mb_s`` (of the input files)
+        and ``efficiency`` (relative to the run on the fewest workers; NaN for the
+        data-size runs).
+    """
+    with contextlib.ExitStack() as stack:
+        if directory is None:
+            directory = stack.enter_context(tempfile.TemporaryDirectory())
+        base_models, base_resolution = min(models), max(resolutions)
+        workers = sorted(workers)
+        runs = [("strong", base_models, base_resolution, w) for w in workers]
+        runs += [("weak", base_models * w // workers[0], base_resolution, w)
+                 for w in workers]
+        runs += [("size", m, r, workers[-1]) for m in models for r in resolutions]
+        results = pd.DataFrame([_run(*run, directory, n_time, repeats, cluster,
+                                     threads_per_worker=threads_per_worker,
+                                     memory_limit=memory_limit) for run in runs])
+
+    results["efficiency"] = np.nan
+    for kind in ("strong", "weak"):
+        runs = results.kind == kind
+        base = results[runs].iloc[0]
+        speedup = base.seconds / results.loc[runs, "seconds"]
+        if kind == "strong":
+            scale = results.loc[runs, "workers"] / base.workers
+            results.loc[runs, "efficiency"] = speedup / scale
+        else:
+            results.loc[runs, "efficiency"] = speedup
+    return results
+
+
+def plot_scaling(results: pd.DataFrame):
+    """Plot the parallel efficiency and the cost of the data-size runs."""
+    import matplotlib.pyplot as plt
+
+    fig, axes = plt.subplots(1, 3, figsize=(15, 4.5))
+    ax = axes[0]
+    for kind in ("strong", "weak"):
+        runs = results[results.kind == kind]
+        ax.plot(runs.workers, runs.efficiency, marker="o", label=f"{kind} scaling")
+    ax.axhline(1, color="gray", linestyle="--", linewidth=1)
+    ax.set(xlabel="workers", ylabel="parallel efficiency", title="Parallel efficiency")
+    ax.set_xscale("log", base=2)
+    ax.legend()
+
+    size = results[results.kind == "size"]
+    for resolution, runs in size.groupby("resolution"):
+        label = f"{resolution:g}°"
+        axes[1].plot(runs.n_models, runs.throughput_mb_s, marker="o", label=label)
+        axes[2].plot(runs.input_mb, runs.peak_memory_mb, marker="o", label=label)
+    axes[1].set(xlabel="models", ylabel="throughput [MB/s]", title="Throughput")
+    axes[2].set(xlabel="input volume [MB]", ylabel="peak memory [MB]", title="Memory")
+    for ax in axes[1:]:
+        ax.legend(title="resolution")
+    fig.tight_layout()
+    return fig
+
+
+def save_scaling_report(results: pd.DataFrame, directory: str | Path | None = None,
+                        style: str = "white_paper", name: str = "scaling") -> dict:
+    """Save the results table and scaling plots via :func:`~bayes_climsim_eval.save`.
+
+    Returns
+    -------
+    dict
+        The paths of the saved ``table`` and ``figure``.
+    """
+    import matplotlib.pyplot as plt
+
+    if directory is None:
+        from . import PLOT_DIR
+        directory = PLOT_DIR
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    table = save(results, directory / f"{name}.csv", index=False)
+    with plt.style.context([mpl_style(style)]):
+        fig = plot_scaling(results)
+        figure = save(fig, directory / f"{name}.png", dpi=150)
+    plt.close(fig)
+    return {"table": table, "figure": figure}
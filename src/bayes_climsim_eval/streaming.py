@@ -0,0 +1,357 @@
+# %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+# Author: Markus Ritschel
+# eMail:  git@markusritschel.de
+# Date:   2026-10-19
+# %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+#
+"""Single-pass streaming estimators for climatologies, trends and variances.
+
+The estimators consume time chunks one after another (e.g. from :func:`iter_time_chunks`
+over a lazily opened dataset), so that arbitrarily long simulations can be processed
+with constant memory. Means and (co-)variances are updated with the numerically stable
+pairwise formulas of Chan et al. (1979), a batched generalisation of Welford's
+algorithm. The same formulas merge the states of accumulators that processed different
+chunks, e.g. on different workers::
+
+    acc = [RunningMoments() for _ in workers]  # each fed with a part of the chunks
+    total = functools.reduce(RunningMoments.merge, acc)
+
+Missing values are ignored per grid cell.
+"""
+import copy
+import logging
+
+import numpy as np
+import xarray as xr
+
+from .precision import promote
+from .timeaxis import time_index
+
+log = logging.getLogger(__name__)
+
+__all__ = ["RunningMoments", "OnlineTrend", "Climatology", "InterannualVariance",
+           "iter_time_chunks", "stream_statistics"]
+
+
+def iter_time_chunks(obj: xr.Dataset | xr.DataArray, size: int = 120,
+                     dim: str = "time"):
+    """Yield consecutive chunks of `size` time steps of a (lazily opened) dataset."""
+    for start in range(0, obj.sizes[dim], size):
+        yield obj.isel({dim: slice(start, start + size)})
+
+
+def _as_array(chunk, dim):
+    """Return the chunk data as float64 array with time as the leading axis."""
+    return promote(chunk.transpose(dim, ...)).values
+
+
+def _template(chunk, dim):
+    """Return a template of a single time step without time-dependent coordinates."""
+    drop = [name for name, coord in chunk.coords.items() if dim in coord.dims]
+    return chunk.isel({dim: 0}).drop_vars(drop)
+
+
+def _month_index(time):
+    """Return the month indices of a raw or already harmonised time axis."""
+    if time.attrs.get("long_name") == "month index":
+        return np.asarray(time.values, dtype=np.int64)
+    return time_index(time, freq="month").values
+
+
+def _fraction(numerator, denominator):
+    numerator, denominator = np.broadcast_arrays(numerator, denominator)
+    return np.divide(numerator, denominator, out=np.zeros(numerator.shape),
+                     where=denominator > 0)
+
+
+def _chunk_moments(x):
+    """Return the count, mean and sum of squared deviations along the first axis."""
+    count = np.isfinite(x).sum(axis=0)
+    mean = _fraction(np.nansum(x, axis=0), count)
+    m2 = np.nansum((x - mean) ** 2, axis=0)
+    return count, mean, m2
+
+
+def _merge_moments(a, b):
+    """Merge two (count, mean, m2) states with the parallel algorithm of Chan et al."""
+    count_a, mean_a, m2_a = a
+    count_b, mean_b, m2_b = b
+    count = count_a + count_b
+    frac = _fraction(count_b, count)
+    delta = mean_b - mean_a
+    return count, mean_a + delta * frac, m2_a + m2_b + delta ** 2 * count_a * frac
+
+
+class RunningMoments:
+    """Streaming mean and variance along the time dimension.
+
+    Example
+    -------
+    >>> acc = RunningMoments()
+    >>> for chunk in iter_time_chunks(xr.DataArray(np.arange(10.), dims="time"), 3):
+    ...     _ = acc.update(chunk)
+    >>> float(acc.mean), float(acc.variance())
+    (4.5, 9.166666666666666)
+    """
+
+    def __init__(self, dim: str = "time"):
+        self.dim = dim
+        self.state = None
+        self._template = None
+
+    def update(self, chunk: xr.DataArray) -> "RunningMoments":
+        """Add a chunk of time steps."""
+        if self._template is None:
+            self._template = _template(chunk, self.dim)
+        self._add(_chunk_moments(_as_array(chunk, self.dim)))
+        return self
+
+    def _add(self, moments):
+        if self.state is not None:
+            moments = _merge_moments(self.state, moments)
+        self.state = moments
+
+    def merge(self, other: "RunningMoments") -> "RunningMoments":
+        """Merge the state of another accumulator into this one."""
+        if other.state is not None:
+            if self._template is None:
+                self._template = other._template
+            self._add(other.state)
+        return self
+
+    def copy(self) -> "RunningMoments":
+        """Return an independent copy of the accumulator."""
+        return copy.deepcopy(self)
+
+    def _wrap(self, values):
+        return self._template.copy(data=values)
+
+    @property
+    def count(self) -> xr.DataArray:
+        """The number of valid values."""
+        return self._wrap(self.state[0])
+
+    @property
+    def mean(self) -> xr.DataArray:
+        """The mean (NaN where there are no valid values)."""
+        count, mean, _ = self.state
+        return self._wrap(np.where(count > 0, mean, np.nan))
+
+    def variance(self, ddof: int = 1) -> xr.DataArray:
+        """Return the variance with `ddof` delta degrees of freedom."""
+        count, _, m2 = self.state
+        return self._wrap(np.where(count > ddof, _fraction(m2, count - ddof), np.nan))
+
+
+class OnlineTrend:
+    """Streaming ordinary least-squares trend (per year) along the time dimension.
+
+    The regression uses the centred co-moments of time and data, which are updated and
+    merged like the moments of :class:`RunningMoments`. Time is taken from the month
+    index of the time axis (see :func:`~bayes_climsim_eval.timeaxis.time_index`).
+    """
+
+    def __init__(self, dim: str = "time"):
+        self.dim = dim
+        self.state = None
+        self._template = None
+
+    def update(self, chunk: xr.DataArray) -> "OnlineTrend":
+        """Add a chunk of time steps."""
+        if self._template is None:
+            self._template = _template(chunk, self.dim)
+        y = _as_array(chunk, self.dim)
+        t = (_month_index(chunk[self.dim]) + 0.5) / 12
+        t = np.where(np.isfinite(y), t.reshape((-1,) + (1,) * (y.ndim - 1)), np.nan)
+        count, mean_t, m2_t = _chunk_moments(t)
+        _, mean_y, m2_y = _chunk_moments(y)
+        c_ty = np.nansum((t - mean_t) * (y - mean_y), axis=0)
+        self._add((count, mean_t, mean_y, m2_t, m2_y, c_ty))
+        return self
+
+    def _add(self, state):
+        if self.state is None:
+            self.state = state
+            return
+        count_a, mean_ta, mean_ya, m2_ta, m2_ya, c_a = self.state
+        count_b, mean_tb, mean_yb, m2_tb, m2_yb, c_b = state
+        count, mean_t, m2_t = _merge_moments((count_a, mean_ta, m2_ta),
+                                             (count_b, mean_tb, m2_tb))
+        _, mean_y, m2_y = _merge_moments((count_a, mean_ya, m2_ya),
+                                         (count_b, mean_yb, m2_yb))
+        c_ty = c_a + c_b + ((mean_tb - mean_ta) * (mean_yb - mean_ya) * count_a
+                            * _fraction(count_b, count))
+        self.state = (count, mean_t, mean_y, m2_t, m2_y, c_ty)
+
+    def merge(self, other: "OnlineTrend") -> "OnlineTrend":
+        """Merge the state of another accumulator into this one."""
+        if other.state is not None:
+            if self._template is None:
+                self._template = other._template
+            self._add(other.state)
+        return self
+
+    @property
+    def slope(self) -> xr.DataArray:
+        """The trend per year."""
+        count, _, _, m2_t, _, c_ty = self.state
+        slope = np.where(count > 1, _fraction(c_ty, m2_t), np.nan)
+        return self._template.copy(data=slope)
+
+    @property
+    def intercept(self) -> xr.DataArray:
+        """The intercept at year 0."""
+        _, mean_t, mean_y, _, _, _ = self.state
+        return self._template.copy(data=mean_y - self.slope.values * mean_t)
+
+    @property
+    def stderr(self) -> xr.DataArray:
+        """The standard error of the slope."""
+        count, _, _, m2_t, m2_y, c_ty = self.state
+        residual = np.clip(m2_y - c_ty * _fraction(c_ty, m2_t), 0, None)
+        var = _fraction(_fraction(residual, count - 2), m2_t)
+        return self._template.copy(data=np.where(count > 2, np.sqrt(var), np.nan))
+
+
+class Climatology:
+    """Streaming mean annual cycle and variance for each calendar month."""
+
+    def __init__(self, dim: str = "time"):
+        self.dim = dim
+        self.months = {month: RunningMoments(dim) for month in range(1, 13)}
+
+    def update(self, chunk: xr.DataArray) -> "Climatology":
+        """Add a chunk of time steps."""
+        month_of_year = _month_index(chunk[self.dim]) % 12 + 1
+        for month in np.unique(month_of_year):
+            self.months[month].update(chunk.isel({self.dim: month_of_year == month}))
+        return self
+
+    def merge(self, other: "Climatology") -> "Climatology":
+        """Merge the state of another accumulator into this one."""
+        for month, moments in self.months.items():
+            moments.merge(other.months[month])
+        return self
+
+    def _stack(self, func):
+        months = [month for month, acc in self.months.items() if acc.state is not None]
+        return xr.concat([func(self.months[month]) for month in months],
+                         dim=xr.DataArray(months, dims="month", name="month"))
+
+    @property
+    def mean(self) -> xr.DataArray:
+        """The mean of each calendar month."""
+        return self._stack(lambda acc: acc.mean)
+
+    def variance(self, ddof: int = 1) -> xr.DataArray:
+        """Return the variance of each calendar month."""
+        return self._stack(lambda acc: acc.variance(ddof))
+
+
+class InterannualVariance:
+    """Streaming variance of annual means.
+
+    Annual sums are kept only for years that may still receive data, i.e. the latest
+    year of the chunks seen so far. Chunks must therefore arrive in chronological order
+    per accumulator; accumulators of different workers should cover complete years.
+    """
+
+    def __init__(self, dim: str = "time"):
+        self.dim = dim
+        self.moments = RunningMoments(dim)
+        self.pending = {}
+
+    def update(self, chunk: xr.DataArray) -> "InterannualVariance":
+        """Add a chunk of time steps."""
+        if self.moments._template is None:
+            self.moments._template = _template(chunk, self.dim)
+        x = _as_array(chunk, self.dim)
+        years = _month_index(chunk[self.dim]) // 12
+        for year in np.unique(years):
+            self._add_partial(year, np.nansum(x[years == year], axis=0),
+                              np.isfinite(x[years == year]).sum(axis=0))
+        self._flush(before=years.max())
+        return self
+
+    def _add_partial(self, year, total, count):
+        if year in self.pending:
+            total_old, count_old = self.pending[year]
+            total, count = total + total_old, count + count_old
+        self.pending[year] = (total, count)
+
+    def _flush(self, before=None):
+        for year in sorted(self.pending):
+            if before is not None and year >= before:
+                continue
+            total, count = self.pending.pop(year)
+            annual_mean = np.where(count > 0, _fraction(total, count), np.nan)
+            self.moments._add(_chunk_moments(annual_mean[np.newaxis]))
+
+    def merge(self, other: "InterannualVariance") -> "InterannualVariance":
+        """Merge the state of another accumulator into this one."""
+        self.moments.merge(other.moments)
+        for year, (total, count) in other.pending.items():
+            self._add_partial(year, total, count)
+        return self
+
+    def variance(self, ddof: int = 1) -> xr.DataArray:
+        """Return the interannual variance including the most recent year."""
+        final = copy.deepcopy(self)
+        final._flush()
+        return final.moments.variance(ddof)
+
+
+def _accumulators(dim):
+    return {"moments": RunningMoments(dim), "trend": OnlineTrend(dim),
+            "climatology": Climatology(dim), "interannual": InterannualVariance(dim)}
+
+
+def _statistics(acc):
+    return {
+        "climatology": acc["climatology"].mean,
+        "mean": acc["moments"].mean,
+        "variance": acc["moments"].variance(),
+        "trend": acc["trend"].slope,
+        "trend_stderr": acc["trend"].stderr,
+        "interannual_variance": acc["interannual"].variance(),
+    }
+
+
+def stream_statistics(chunks, dim: str = "time") -> xr.Dataset:
+    """Compute climatology, trend and interannual variance in one pass over `chunks`.
+
+    Parameters
+    ----------
+    chunks : iterable of xr.DataArray or xr.Dataset
+        Consecutive time chunks, e.g. from :func:`iter_time_chunks` or one per file.
+    dim : str
+        The name of the time dimension.
+
+    Returns
+    -------
+    xr.Dataset
+        With the variables ``climatology`` (per calendar month), ``trend`` (per year),
+        ``trend_stderr``, ``mean``, ``variance`` and ``interannual_variance``. For
+        Dataset chunks, these are computed for each data variable with the time
+        dimension and named ``<variable>_<statistic>``, e.g. ``tas_trend``.
+    """
+    accumulators = None
+    for i, chunk in enumerate(chunks):
+        log.debug("Stream chunk %d with %d time steps", i, chunk.sizes[dim])
+        chunk = chunk.load()
+        if isinstance(chunk, xr.Dataset):
+            fields = {name: da for name, da in chunk.data_vars.items()
+                      if dim in da.dims}
+        else:
+            fields = {None: chunk}
+        if accumulators is None:
+            accumulators = {name: _accumulators(dim) for name in fields}
+        for name, acc in accumulators.items():
+            for estimator in acc.values():
+                estimator.update(fields[name])
+    if accumulators is None:
+        raise ValueError("No chunks to stream.")
+    if list(accumulators) == [None]:
+        return xr.Dataset(_statistics(accumulators[None]))
+    return xr.Dataset({f"{name}_{stat}": value for name, acc in accumulators.items()
+                       for stat, value in _statistics(acc).items()})
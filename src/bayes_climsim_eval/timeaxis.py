@@ -0,0 +1,279 @@
+# %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+# Author: Markus Ritschel
+# eMail:  git@markusritschel.de
+# Date:   2026-10-19
+# %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+#
+"""Harmonisation of time axes with mixed calendars and frequencies.
+
+Instead of decoding time axes into object arrays of :mod:`cftime` dates, the raw CF time
+values (e.g. ``days since 1850-01-01`` in a ``noleap`` calendar) are converted with
+vectorised integer arithmetic into
+
+- a *month index*, i.e. the number of months since ``0000-01``, or
+- a *day index*, i.e. the number of days since ``0001-01-01`` in the dataset's calendar.
+
+Month indices are comparable across calendars, so that models and observations can be
+resampled and aligned by plain index arithmetic. Datasets should be opened with
+``decode_times=False`` (see :func:`open_harmonised`); already decoded ``datetime64``
+axes are supported as well, decoded :mod:`cftime` axes only through a slow fallback.
+"""
+import functools
+import logging
+import re
+
+import numpy as np
+import xarray as xr
+
+log = logging.getLogger(__name__)
+
+__all__ = ["time_index", "harmonise_time", "align_time", "open_harmonised",
+           "month_index_to_year_month", "day_index_to_year_month"]
+
+FREQUENCIES = ("month", "day")
+
+_MONTH_LENGTHS = {
+    "noleap": [31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31],
+    "all_leap": [31, 29, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31],
+    "360_day": [30] * 12,
+}
+_MONTH_LENGTHS["365_day"] = _MONTH_LENGTHS["noleap"]
+_MONTH_LENGTHS["366_day"] = _MONTH_LENGTHS["all_leap"]
+_GREGORIAN = ("standard", "gregorian", "proleptic_gregorian")
+
+_UNITS_IN_DAYS = {
+    "days": 1, "day": 1, "d": 1,
+    "hours": 1 / 24, "hour": 1 / 24, "h": 1 / 24,
+    "minutes": 1 / 1440, "minute": 1 / 1440, "min": 1 / 1440,
+    "seconds": 1 / 86400, "second": 1 / 86400, "s": 1 / 86400,
+}
+_UNITS_PATTERN = re.compile(
+    r"^\s*(\w+)\s+since\s+(-?\d+)-(\d{1,2})-(\d{1,2})"
+    r"(?:[ T](\d{1,2}):(\d{1,2})(?::(\d{1,2}(?:\.\d*)?))?)?")
+
+
+def _parse_units(units):
+    """Split CF time units into the length of a unit in days and the reference date."""
+    match = _UNITS_PATTERN.match(units)
+    if not match or match.group(1).lower() not in _UNITS_IN_DAYS:
+        raise ValueError(f"Unsupported time units '{units}'.")
+    unit, year, month, day, hour, minute, second = match.groups()
+    seconds = int(hour or 0) * 3600 + int(minute or 0) * 60 + float(second or 0)
+    fraction = seconds / 86400
+    return _UNITS_IN_DAYS[unit.lower()], int(year), int(month), int(day), fraction
+
+
+def _fixed_length_dates(days, year, month, day, calendar):
+    """Return year, month, day and day index for calendars with a fixed year length."""
+    cumulative = np.concatenate([[0], np.cumsum(_MONTH_LENGTHS[calendar])])
+    year_length = cumulative[-1]
+    ordinal = year * year_length + cumulative[month - 1] + day - 1 + days
+    years, day_of_year = np.divmod(ordinal, year_length)
+    months = np.searchsorted(cumulative, day_of_year, side="right")
+    days_of_month = day_of_year - cumulative[months - 1] + 1
+    return years, months, days_of_month, ordinal - year_length
+
+
+def _gregorian_dates(days, year, month, day, calendar):
+    """Return year, month, day and day index for the (proleptic) Gregorian calendar."""
+    if calendar != "proleptic_gregorian" and year < 1583:
+        log.warning("Reference year %d precedes the Gregorian reform; dates are "
+                    "treated as proleptic Gregorian.", year)
+    reference = np.datetime64(f"{year:04d}-{month:02d}-{day:02d}", "D")
+    dates = reference + days.astype("timedelta64[D]")
+    months_since_epoch = dates.astype("datetime64[M]").astype(np.int64)
+    years, months = np.divmod(months_since_epoch, 12)
+    day_of_month = (dates - dates.astype("datetime64[M]")).astype(np.int64) + 1
+    ordinal = (dates - np.datetime64("0001-01-01", "D")).astype(np.int64)
+    return years + 1970, months + 1, day_of_month, ordinal
+
+
+def _decode(values, units, calendar):
+    """Convert raw CF time values into year, month, day and day index (vectorised)."""
+    calendar = (calendar or "standard").lower()
+    factor, year, month, day, fraction = _parse_units(units)
+    days = np.floor(np.asarray(values, dtype=np.float64) * factor + fraction + 1e-9)
+    days = days.astype(np.int64)
+    if calendar in _MONTH_LENGTHS:
+        return _fixed_length_dates(days, year, month, day, calendar)
+    if calendar in _GREGORIAN:
+        return _gregorian_dates(days, year, month, day, calendar)
+    raise ValueError(f"Unsupported calendar '{calendar}'.")
+
+
+def _decoded_dates(time):
+    """Fallback for decoded time axes (datetime64 or cftime objects)."""
+    values = time.values
+    if np.issubdtype(values.dtype, np.datetime64):
+        days = values.astype("datetime64[D]")
+        offset = (days - np.datetime64("1970-01-01", "D")).astype(np.float64)
+        return _decode(offset, "days since 1970-01-01", "proleptic_gregorian")
+    log.warning("Time axis '%s' holds decoded cftime objects. Open the data with "
+                "`decode_times=False` to avoid the slow conversion.", time.name)
+    calendar = getattr(values.flat[0], "calendar", "standard")
+    reference = type(values.flat[0])(1, 1, 1)
+    offset = np.array([(value - reference).days for value in values.ravel()],
+                      dtype=np.float64)
+    return _decode(offset.reshape(values.shape), "days since 0001-01-01", calendar)
+
+
+def _calendar(time):
+    return time.attrs.get("calendar", time.encoding.get("calendar", "standard"))
+
+
+def time_index(time: xr.DataArray, freq: str = "month") -> xr.DataArray:
+    """Convert a time axis into integer month or day indices.
+
+    Parameters
+    ----------
+    time : xr.DataArray
+        The time coordinate, preferably undecoded (i.e. with ``units`` and ``calendar``
+        attributes).
+    freq : str
+        Either ``"month"`` (months since ``0000-01``) or ``"day"`` (days since
+        ``0001-01-01`` in the native calendar).
+
+    Returns
+    -------
+    xr.DataArray
+        The integer indices along the time dimension.
+
+    Example
+    -------
+    >>> t = xr.DataArray([0, 31, 59], dims="time",
+    ...                  attrs={"units": "days since 1850-01-01", "calendar": "noleap"})
+    >>> time_index(t).values
+    array([22200, 22201, 22202])
+    """
+    if freq not in FREQUENCIES:
+        raise ValueError(f"Unknown frequency '{freq}'. Choose one of {FREQUENCIES}.")
+    units = time.attrs.get("units", time.encoding.get("units"))
+    if np.issubdtype(time.dtype, np.number) and units:
+        years, months, _, ordinal = _decode(time.values, units, _calendar(time))
+    else:
+        years, months, _, ordinal = _decoded_dates(time)
+    index = years * 12 + months - 1 if freq == "month" else ordinal
+    units = "months since 0000-01" if freq == "month" else "days since 0001-01-01"
+    attrs = {"units": units,
+             "calendar": _calendar(time) if freq == "day" else "any",
+             "long_name": f"{freq} index"}
+    return xr.DataArray(np.asarray(index, dtype=np.int64), dims=time.dims, attrs=attrs)
+
+
+def month_index_to_year_month(index):
+    """Convert month indices back into years and months.
+
+    Example
+    -------
+    >>> month_index_to_year_month(np.array([22200, 22211]))
+    (array([1850, 1850]), array([ 1, 12]))
+    """
+    years, months = np.divmod(np.asarray(index), 12)
+    return years, months + 1
+
+
+def day_index_to_year_month(index, calendar: str = "standard"):
+    """Convert day indices back into years and months.
+
+    The indices are days since ``0001-01-01`` in `calendar`, see :func:`time_index`.
+
+    Example
+    -------
+    >>> day_index_to_year_month(np.array([0, 31, 365]), "noleap")
+    (array([1, 1, 2]), array([1, 2, 1]))
+    """
+    if calendar.lower() in _GREGORIAN:
+        calendar = "proleptic_gregorian"  # as in time_index
+    years, months, _, _ = _decode(index, "days since 0001-01-01", calendar)
+    return years, months
+
+
+def harmonise_time(obj: xr.Dataset | xr.DataArray, freq: str = "month",
+                   dim: str = "time") -> xr.Dataset | xr.DataArray:
+    """Replace the time coordinate by integer indices and resample to `freq`.
+
+    If several time steps fall into the same index (e.g. daily data with
+    ``freq="month"``), they are averaged. For dask-backed data this happens lazily.
+
+    Parameters
+    ----------
+    obj : xr.Dataset | xr.DataArray
+        The data with a time dimension `dim`.
+    freq : str
+        Either ``"month"`` or ``"day"``.
+    dim : str
+        The name of the time dimension.
+    """
+    index = time_index(obj[dim], freq=freq)
+    calendar = _calendar(obj[dim])
+    drop = [name for name in (f"{dim}_bnds", f"{dim}_bounds")
+            if name in obj.coords or name in getattr(obj, "data_vars", {})]
+    obj = obj.drop_vars(drop).assign_coords({dim: index.values})
+    if not obj.indexes[dim].is_unique:
+        log.debug("Resample %d time steps to %d %s indices", obj.sizes[dim],
+                  len(np.unique(index)), freq)
+        obj = obj.groupby(dim).mean()
+    obj[dim].attrs = dict(index.attrs, source_calendar=calendar)
+    return obj
+
+
+def align_time(*objs: xr.Dataset | xr.DataArray, freq: str = "month",
+               join: str = "inner", dim: str = "time") -> tuple:
+    """Harmonise the time axes of all objects and align them on common indices.
+
+    Objects of which the time axis is already harmonised (see :func:`harmonise_time`)
+    are aligned as they are. Daily alignment requires all objects to share the same
+    calendar.
+
+    Parameters
+    ----------
+    join : str
+        How to combine the time axes, see :func:`xarray.align`.
+    """
+    harmonised = [obj if obj[dim].attrs.get("long_name") == f"{freq} index"
+                  else harmonise_time(obj, freq=freq, dim=dim) for obj in objs]
+    if freq == "day":
+        calendars = {obj[dim].attrs["source_calendar"] for obj in harmonised}
+        if len(calendars) > 1:
+            raise ValueError(f"Cannot align daily data across calendars {calendars}. "
+                             "Use `freq='month'` instead.")
+    exclude = [d for d in harmonised[0].dims if d != dim]
+    return xr.align(*harmonised, join=join, exclude=exclude)
+
+
+def open_harmonised(paths, freq: str = "month", chunks: dict | None = None,
+                    precision: str = "float64", valid_range: tuple | dict | None = None,
+                    **kwargs) -> xr.Dataset:
+    """Open (multiple) files lazily with a harmonised time axis.
+
+    The time axis of each file is converted before the files are combined, so that files
+    with different reference dates are concatenated correctly.
+
+    Parameters
+    ----------
+    paths : str | list
+        The file paths or glob pattern, as accepted by :func:`xarray.open_mfdataset`.
+    freq : str
+        Either ``"month"`` or ``"day"``.
+    chunks : dict, optional
+        The dask chunks. Defaults to the chunking on disk.
+    precision : str
+        The precision of the data variables, see
+        :func:`~bayes_climsim_eval.precision.apply_precision`. For ``"int16"``, the
+        value ranges of the variables are computed eagerly (one pass over all files)
+        unless given as `valid_range` or taken from the int16 packing of the (first)
+        file.
+    valid_range : tuple | dict, optional
+        The value range(s) of the int16 packing, see
+        :func:`~bayes_climsim_eval.precision.apply_precision`.
+    **kwargs
+        Further keyword arguments passed to :func:`xarray.open_mfdataset`.
+    """
+    from .precision import apply_precision
+
+    kwargs.setdefault("combine", "by_coords")
+    ds = xr.open_mfdataset(paths, decode_times=False,
+                           chunks=chunks if chunks is not None else {},
+                           preprocess=functools.partial(harmonise_time, freq=freq),
+                           **kwargs)
+    return apply_precision(ds, precision, valid_range=valid_range)
@@ -0,0 +1,87 @@
+# %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+# Author: Markus Ritschel
+# eMail:  git@markusritschel.de
+# Date:   2026-10-19
+# %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+#
+r"""Model weights combining performance and independence (ClimWIP, Knutti et al., 2017).
+
+The performance term is a Gaussian likelihood of the model-observation distance
+:math:`D_i`, the independence term down-weights models that are close to other models:
+
+.. math::
+
+    w_i \propto \frac{\exp(-D_i^2/\sigma_D^2)}
+                      {1 + \sum_{j \neq i} \exp(-S_{ij}^2/\sigma_S^2)}
+"""
+import logging
+
+import numpy as np
+import xarray as xr
+
+log = logging.getLogger(__name__)
+
+__all__ = ["performance_weights", "independence_weights", "climwip_weights"]
+
+
+def _similarity(distances, sigma_s, dim):
+    r"""Return :math:`\exp(-S_{ij}^2/\sigma_S^2)` with a zero diagonal."""
+    similarity = np.exp(-(distances / sigma_s) ** 2)
+    off_diagonal = distances[f"{dim}_i"] != distances[f"{dim}_j"]
+    return similarity.where(off_diagonal, 0.0)
+
+
+def performance_weights(distances: xr.DataArray,
+                        sigma_d: float | xr.DataArray) -> xr.DataArray:
+    r"""Return the (unnormalised) performance term :math:`\exp(-D_i^2/\sigma_D^2)`.
+
+    Example
+    -------
+    >>> d = xr.DataArray([0., 1.], dims="model")
+    >>> performance_weights(d, 1.).values.round(3)
+    array([1.   , 0.368])
+    """
+    return np.exp(-(distances / sigma_d) ** 2)
+
+
+def independence_weights(distances: xr.DataArray, sigma_s: float | xr.DataArray,
+                         dim: str = "model") -> xr.DataArray:
+    """Return the (unnormalised) independence term from a pairwise distance matrix.
+
+    Parameters
+    ----------
+    distances : xr.DataArray
+        The model-model distance matrix with dimensions ``{dim}_i`` and ``{dim}_j``, as
+        returned by :func:`~bayes_climsim_eval.distances.pairwise_distances`.
+    sigma_s : float | xr.DataArray
+        The similarity radius.
+    dim : str
+        The name of the model dimension of the returned weights.
+    """
+    similarity = _similarity(distances, sigma_s, dim)
+    return (1 / (1 + similarity.sum(f"{dim}_j"))).rename({f"{dim}_i": dim})
+
+
+def climwip_weights(obs_distances: xr.DataArray, model_distances: xr.DataArray,
+                    sigma_d: float | xr.DataArray, sigma_s: float | xr.DataArray,
+                    dim: str = "model") -> xr.DataArray:
+    """Compute normalised model weights from performance and independence.
+
+    Parameters
+    ----------
+    obs_distances : xr.DataArray
+        The model-observation distances along `dim`.
+    model_distances : xr.DataArray
+        The model-model distance matrix with dimensions ``{dim}_i`` and ``{dim}_j``.
+    sigma_d, sigma_s : float | xr.DataArray
+        The performance and similarity radii. DataArrays add a dimension to the result,
+        which allows evaluating a whole grid of radii at once.
+
+    Returns
+    -------
+    xr.DataArray
+        The weights along `dim`, summing up to one.
+    """
+    weights = performance_weights(obs_distances, sigma_d) * independence_weights(
+        model_distances, sigma_s, dim)
+    return weights / weights.sum(dim)
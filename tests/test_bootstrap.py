@@ -0,0 +1,77 @@
+# %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+# Author: Markus Ritschel
+# eMail:  git@markusritschel.de
+# Date:   2026-10-19
+# %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+#
+import numpy as np
+import pytest
+import xarray as xr
+
+from bayes_climsim_eval.bootstrap import (
+    block_bootstrap_indices,
+    bootstrap,
+    bootstrap_interval,
+)
+from bayes_climsim_eval.precision import apply_precision, promote
+
+
+@pytest.fixture
+def field():
+    rng = np.random.default_rng(5)
+    data = rng.normal(size=(3, 4, 150))
+    data[0, 0, 7] = np.nan
+    return xr.DataArray(data, dims=("model", "cell", "time"))
+
+
+def _loop(field, indices, func):
+    return np.stack([func(field.isel(time=idx)) for idx in indices], axis=-1)
+
+
+@pytest.mark.parametrize("statistic", ["mean", "std"])
+def test_count_statistics_match_loop(field, statistic):
+    indices = block_bootstrap_indices(150, 50, block_size=10, seed=1)
+    expected = _loop(field, indices, lambda x: getattr(x, statistic)("time", ddof=1)
+                     if statistic == "std" else x.mean("time"))
+    result = bootstrap(field.chunk(cell=2), statistic=statistic, indices=indices,
+                       batch_size=16)
+    assert result.dims == ("model", "cell", "resample")
+    np.testing.assert_allclose(result, expected, rtol=1e-10)
+
+
+def test_variance_of_data_far_from_zero(field):
+    indices = block_bootstrap_indices(150, 20, seed=3)
+    expected = bootstrap(field, statistic="var", indices=indices)
+    result = bootstrap(field + 1e8, statistic="var", indices=indices)
+    np.testing.assert_allclose(result, expected, rtol=1e-6)
+
+
+def test_packed_input(field):
+    packed = apply_precision(field, "int16")
+    indices = block_bootstrap_indices(150, 20, seed=4)
+    for statistic in ("mean", np.nanmean):
+        result = bootstrap(packed, statistic=statistic, indices=indices)
+        expected = bootstrap(promote(packed), statistic=statistic, indices=indices)
+        np.testing.assert_allclose(result, expected)
+        assert np.isfinite(result).all()
+
+
+def test_paired_statistic_matches_loop(field):
+    obs = field.isel(model=0, drop=True)
+    indices = block_bootstrap_indices(150, 40, seed=2)
+
+    def rmse(m, o, axis):
+        return np.sqrt(np.nanmean((m - o) ** 2, axis=axis))
+
+    result = bootstrap(field, obs, statistic=rmse, indices=indices, batch_size=7)
+    expected = np.stack([rmse(field.values[..., idx], obs.values[..., idx], axis=-1)
+                         for idx in indices], axis=-1)
+    np.testing.assert_allclose(result, expected)
+    np.testing.assert_allclose(result.isel(model=0), 0)
+
+
+def test_interval(field):
+    samples = bootstrap(field, n_resamples=500, seed=0)
+    interval = bootstrap_interval(samples)
+    assert (interval.sel(bound="lower") < field.mean("time")).all()
+    assert (interval.sel(bound="upper") > field.mean("time")).all()
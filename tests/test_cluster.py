@@ -0,0 +1,35 @@
+# %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+# Author: Markus Ritschel
+# eMail:  git@markusritschel.de
+# Date:   2026-10-19
+# %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+#
+import dask
+import dask.array
+from rich.console import Console
+
+from bayes_climsim_eval.core.cluster import (
+    cluster_config,
+    cluster_summary,
+    compute_cluster,
+)
+
+
+def test_cluster_config_respects_explicit_values():
+    config = cluster_config(n_workers=3, threads_per_worker=2, memory_limit="1GB")
+    assert config == {"n_workers": 3, "threads_per_worker": 2, "memory_limit": "1GB"}
+    assert cluster_config()["memory_limit"] > 0
+
+
+def test_compute_cluster(tmp_path):
+    with compute_cluster(n_workers=1, adaptive=False, processes=False,
+                         spill_dir=tmp_path, dashboard_address=":0") as client:
+        assert dask.array.ones(10, chunks=2).sum().compute() == 10
+        workers = client.scheduler_info()["workers"].values()
+        assert all(w["local_directory"].startswith(str(tmp_path)) for w in workers)
+        console = Console(record=True, width=200)
+        console.print(cluster_summary(client))
+        assert "dashboard" in console.export_text()
+    assert dask.config.get("temporary-directory") != str(tmp_path)
+    with compute_cluster(enabled=False) as client:
+        assert client is None
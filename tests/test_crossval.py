@@ -0,0 +1,69 @@
+# %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+# Author: Markus Ritschel
+# eMail:  git@markusritschel.de
+# Date:   2026-10-19
+# %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+#
+import numpy as np
+import pytest
+import xarray as xr
+
+from bayes_climsim_eval.crossval import perfect_model_test, perfect_model_weights
+from bayes_climsim_eval.distances import observation_distances, pairwise_distances
+from bayes_climsim_eval.weighting import climwip_weights
+
+
+@pytest.fixture
+def ensemble():
+    rng = np.random.default_rng(42)
+    data = rng.normal(size=(5, 24, 4, 6))
+    data[1] = data[0] + 0.1 * rng.normal(size=data[0].shape)
+    lat = np.linspace(-60, 60, 4)
+    field = xr.DataArray(data, dims=("model", "time", "lat", "lon"),
+                         coords={"model": list("abcde"), "lat": lat})
+    weights = np.cos(np.deg2rad(field.lat))
+    return field, weights
+
+
+def test_pairwise_distances_match_loop(ensemble):
+    field, weights = ensemble
+    dist = pairwise_distances(field, weights, time_chunk=7)
+    w = weights.broadcast_like(field.isel(model=0))
+    for i in range(5):
+        for j in range(5):
+            diff = field.isel(model=i) - field.isel(model=j)
+            expected = np.sqrt((diff ** 2).weighted(w).mean())
+            assert dist.values[i, j] == pytest.approx(float(expected), abs=1e-10)
+    assert dist.dims == ("model_i", "model_j")
+
+
+def test_pairwise_distances_dask(ensemble):
+    field, weights = ensemble
+    expected = pairwise_distances(field, weights, metric="correlation")
+    result = pairwise_distances(field.chunk(time=5), weights, metric="correlation")
+    np.testing.assert_allclose(result, expected, atol=1e-12)
+
+
+def test_perfect_model_weights_match_loop(ensemble):
+    field, weights = ensemble
+    dist = pairwise_distances(field, weights)
+    result = perfect_model_weights(dist, sigma_d=1.2, sigma_s=0.8)
+    for k, name in enumerate(dist.model_i.values):
+        others = [m for m in dist.model_i.values if m != name]
+        pseudo_obs = field.isel(model=k)
+        expected = climwip_weights(
+            observation_distances(field.sel(model=others), pseudo_obs, weights),
+            dist.sel(model_i=others, model_j=others), 1.2, 0.8)
+        np.testing.assert_allclose(result.sel(perfect_model=name, model=others),
+                                   expected)
+        assert result.sel(perfect_model=name, model=name) == 0
+
+
+def test_perfect_model_test_sigma_grid(ensemble):
+    field, weights = ensemble
+    dist = pairwise_distances(field, weights)
+    target = field.mean(("time", "lat", "lon"))
+    sigma_d = xr.DataArray([0.5, 1., 2.], dims="sigma_d")
+    result = perfect_model_test(dist, target, sigma_d, 0.8)
+    assert result.skill.dims == ("sigma_d",)
+    np.testing.assert_allclose(result.weights.sum("model"), 1)
@@ -0,0 +1,64 @@
+# %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+# Author: Markus Ritschel
+# eMail:  git@markusritschel.de
+# Date:   2026-10-19
+# %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+#
+import numpy as np
+import pytest
+import xarray as xr
+
+from bayes_climsim_eval import distances
+from bayes_climsim_eval.distances import DistanceMatrixCache, pairwise_distances
+
+
+@pytest.fixture
+def ensemble():
+    rng = np.random.default_rng(0)
+    field = xr.DataArray(rng.normal(size=(7, 30, 3, 5)),
+                         dims=("model", "time", "lat", "lon"),
+                         coords={"model": [f"m{i}" for i in range(7)]})
+    return field, xr.DataArray(np.linspace(0.5, 1, 3), dims="lat")
+
+
+@pytest.mark.parametrize("metric", ["rmse", "correlation"])
+def test_blocked_matches_single_block(ensemble, metric):
+    field, weights = ensemble
+    expected = pairwise_distances(field, weights, metric=metric)
+    blocked = pairwise_distances(field.chunk(time=10), weights, metric=metric,
+                                 model_block=3)
+    np.testing.assert_allclose(blocked, expected, atol=1e-12)
+    np.testing.assert_allclose(blocked, blocked.T)
+
+
+def test_cache_computes_only_new_rows(ensemble, tmp_path, monkeypatch):
+    field, weights = ensemble
+    cache = DistanceMatrixCache(tmp_path)
+    first = cache.pairwise_distances(field.isel(model=slice(0, 6)), "tas", weights)
+    expected = pairwise_distances(field, weights)
+
+    calls = []
+    compute = distances._compute
+    monkeypatch.setattr(distances, "_compute",
+                        lambda *args: calls.append(args[5]) or compute(*args))
+    full = cache.pairwise_distances(field, "tas", weights)
+    assert calls == [slice(6, 7)]
+    np.testing.assert_allclose(full, expected, atol=1e-12)
+    np.testing.assert_allclose(full.isel(model_i=slice(0, 6), model_j=slice(0, 6)),
+                               first)
+
+    subset = cache.pairwise_distances(field.sel(model=["m6", "m2"]), "tas", weights)
+    assert len(calls) == 1
+    assert list(subset.model_i.values) == ["m6", "m2"]
+
+
+def test_cache_does_not_mix_fields(ensemble, tmp_path):
+    field, weights = ensemble
+    cache = DistanceMatrixCache(tmp_path)
+    other = (2 * field).rename("pr")
+    shorter = field.isel(time=slice(0, 20))
+    for tas, pr in [(field, other), (field, shorter)]:
+        cache.pairwise_distances(tas, "tas", weights)
+        np.testing.assert_allclose(cache.pairwise_distances(pr, "tas", weights),
+                                   pairwise_distances(pr, weights), atol=1e-12)
+    assert len(list(tmp_path.glob("*.npz"))) == 3
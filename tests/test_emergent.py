@@ -0,0 +1,77 @@
+# %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+# Author: Markus Ritschel
+# eMail:  git@markusritschel.de
+# Date:   2026-10-19
+# %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+#
+import numpy as np
+import pytest
+import xarray as xr
+from scipy import stats
+
+from bayes_climsim_eval.emergent import (
+    benjamini_hochberg,
+    fit_emergent_constraints,
+    rank_predictors,
+)
+from bayes_climsim_eval.precision import apply_precision, promote
+
+
+@pytest.fixture
+def candidates():
+    rng = np.random.default_rng(8)
+    response = xr.DataArray(3 + rng.normal(size=25), dims="model")
+    predictors = xr.DataArray(rng.normal(size=(25, 10, 20)),
+                              dims=("model", "lat", "lon"))
+    # a single genuine emergent relationship
+    predictors[:, 2, 3] = 0.5 * response + 0.1 * rng.normal(size=25)
+    predictors[4, 0, 0] = np.nan
+    return predictors, response
+
+
+def test_regressions_match_scipy(candidates):
+    predictors, response = candidates
+    result = fit_emergent_constraints(predictors, response, obs=1.6, obs_std=0.05,
+                                      chunks={"lat": 3}).compute()
+    for lat, lon in [(0, 0), (2, 3), (7, 11)]:
+        x = predictors.isel(lat=lat, lon=lon).values
+        valid = np.isfinite(x)
+        fit = stats.linregress(x[valid], response.values[valid])
+        cell = result.isel(lat=lat, lon=lon)
+        np.testing.assert_allclose(
+            [cell.slope, cell.intercept, cell.correlation, cell.pvalue],
+            [fit.slope, fit.intercept, fit.rvalue, fit.pvalue])
+        assert int(cell.n) == valid.sum()
+    cell = result.isel(lat=2, lon=3)
+    assert cell.lower < cell["mean"] < cell.upper
+    assert float(cell.variance_reduction) > 0.9
+
+
+def test_packed_input(candidates):
+    predictors, response = candidates
+    response = response.where(response.model != 7)
+    packed = fit_emergent_constraints(apply_precision(predictors, "int16"),
+                                      apply_precision(response, "int16"), obs=1.6)
+    expected = fit_emergent_constraints(promote(apply_precision(predictors, "int16")),
+                                        promote(apply_precision(response, "int16")),
+                                        obs=1.6)
+    xr.testing.assert_allclose(packed, expected)
+    assert int(packed.n.isel(lat=2, lon=3)) == 24
+
+
+def test_benjamini_hochberg_matches_scipy():
+    p = np.random.default_rng(0).uniform(size=(50, 4)) ** 2
+    p[3, 1] = np.nan
+    q = benjamini_hochberg(xr.DataArray(p))
+    finite = np.isfinite(p)
+    np.testing.assert_allclose(q.values[finite],
+                               stats.false_discovery_control(p[finite]))
+    assert np.isnan(q.values[3, 1])
+
+
+def test_ranking_finds_genuine_predictor(candidates):
+    predictors, response = candidates
+    result = fit_emergent_constraints(predictors.chunk(lat=5), response, 1.6)
+    table = rank_predictors(result)
+    assert list(table.index) == [(2, 3)]
+    assert table.qvalue.iloc[0] < 1e-10
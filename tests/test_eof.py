@@ -0,0 +1,52 @@
+# %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+# Author: Markus Ritschel
+# eMail:  git@markusritschel.de
+# Date:   2026-10-19
+# %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+#
+import numpy as np
+import pytest
+import xarray as xr
+
+from bayes_climsim_eval.eof import area_weights, eof, project
+
+
+@pytest.fixture
+def field():
+    rng = np.random.default_rng(6)
+    lat, lon = np.linspace(-80, 80, 17), np.arange(0, 360, 20.)
+    patterns = rng.normal(size=(3, lat.size, lon.size))
+    amplitudes = rng.normal(size=(240, 3)) * [5, 3, 2]
+    data = (np.einsum("tk,kyx->tyx", amplitudes, patterns)
+            + 0.1 * rng.normal(size=(240, 17, 18)))
+    data[:, 0, 0] = np.nan
+    return xr.DataArray(data, dims=("time", "lat", "lon"),
+                        coords={"lat": lat, "lon": lon})
+
+
+def _numpy_svd(field):
+    x = (field - field.mean("time")) * area_weights(field.lat)
+    x = x.fillna(0).values.reshape(field.sizes["time"], -1)
+    return np.linalg.svd(x, full_matrices=False)
+
+
+@pytest.mark.parametrize("method", ["randomized", "exact"])
+def test_eof_matches_numpy(field, method):
+    result = eof(field.chunk(time=60), n_modes=3, method=method, seed=0,
+                 space_chunk=100)
+    _, s, vt = _numpy_svd(field)
+    np.testing.assert_allclose(result.explained_variance, s[:3] ** 2 / 239, rtol=1e-6)
+    assert result.explained_variance_ratio.sum() > 0.99
+    patterns = result.eofs.fillna(0).values.reshape(3, -1)
+    np.testing.assert_allclose(np.abs(np.sum(patterns * vt[:3], axis=1)), 1, rtol=1e-6)
+    assert result.eofs.isel(lat=0, lon=0).isnull().all()
+    assert result.eofs.dims == ("mode", "lat", "lon")
+
+
+def test_project_all_models(field):
+    result = eof(field, n_modes=3, seed=0)
+    np.testing.assert_allclose(project(field, result), result.pcs, atol=1e-8)
+    models = xr.concat([field, 2 * field], dim="model").chunk(model=1)
+    pcs = project(models, result)
+    assert pcs.dims == ("model", "time", "mode") and pcs.chunks is not None
+    np.testing.assert_allclose(pcs.isel(model=1), 2 * result.pcs, atol=1e-8)
@@ -0,0 +1,70 @@
+# %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+# Author: Markus Ritschel
+# eMail:  git@markusritschel.de
+# Date:   2026-10-19
+# %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+#
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import xarray as xr
+
+from bayes_climsim_eval.core.memoize import DiskCache, memoize
+
+
+def test_memoize_caches_lazy_results(tmp_path):
+    calls = []
+    cache = DiskCache(tmp_path)
+
+    @memoize(cache=cache)
+    def anomaly(da, offset=0):
+        calls.append(offset)
+        return da - da.mean() + offset
+
+    da = xr.DataArray(np.arange(6.), dims="time").chunk(time=2)
+    first = anomaly(da)
+    second = anomaly(da, offset=0)
+    assert calls == [0]
+    assert first.chunks is None
+    xr.testing.assert_identical(first, second)
+    anomaly(da * 2)
+    assert calls == [0, 0]
+
+
+def test_lru_eviction(tmp_path):
+    cache = DiskCache(tmp_path, max_size=3000)
+    for i, key in enumerate("abc"):
+        cache.set(key, np.zeros(100))
+        os.utime(cache.path(key), (i, i))
+    cache.get("a")
+    cache.set("d", np.zeros(100))
+    assert "a" in cache and "d" in cache
+    assert "b" not in cache
+    assert cache.size() <= 3000
+
+
+def test_concurrent_writers_and_eviction(tmp_path):
+    caches = [DiskCache(tmp_path, max_size=3000) for _ in range(4)]
+
+    def work(i):
+        cache = caches[i % 4]
+        cache.set(f"k{i}", np.full(100, i))
+        cache.get(f"k{i - 1}")
+
+    with ThreadPoolExecutor(8) as pool:
+        list(pool.map(work, range(200)))
+    assert caches[0].size() <= 3000
+
+
+def test_threads_writing_the_same_key(tmp_path):
+    cache = DiskCache(tmp_path)
+
+    def work(i):
+        cache.set("key", np.full(100_000, i % 8))
+        value = cache.get("key")
+        assert (value == value[0]).all()
+
+    with ThreadPoolExecutor(8) as pool:
+        list(pool.map(work, range(200)))
+    assert not list(tmp_path.rglob("*.tmp"))
@@ -0,0 +1,96 @@
+# %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+# Author: Markus Ritschel
+# eMail:  git@markusritschel.de
+# Date:   2026-10-19
+# %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+#
+import numpy as np
+import pytest
+import xarray as xr
+
+import bayes_climsim_eval.observations as observations
+from bayes_climsim_eval.observations import ObservationStore
+
+pytest.importorskip("zarr")
+
+
+@pytest.fixture
+def sources(tmp_path):
+    rng = np.random.default_rng(4)
+    paths = []
+    for i, start in enumerate((1980, 1995)):
+        days = (np.arange(15 * 12) * 365 / 12 + 15 + (start - 1980) * 365)
+        time = xr.DataArray(days, dims="time", attrs={"units": "days since 1980-01-01",
+                                                       "calendar": "noleap"})
+        cycle = 10 * np.sin(2 * np.pi * np.arange(15 * 12) / 12)[:, None, None]
+        tas = 280 + cycle + rng.normal(size=(180, 6, 8))
+        tas[:, 0, 0] = np.nan
+        ds = xr.Dataset({"tas": (("time", "lat", "lon"), tas)},
+                        coords={"time": time, "lat": np.linspace(-75, 75, 6),
+                                "lon": np.arange(0, 360, 45.)})
+        paths.append(tmp_path / f"obs_{i}.nc")
+        ds.to_netcdf(paths[-1])
+    return paths
+
+
+def test_ingest_and_open(tmp_path, sources):
+    store = ObservationStore(tmp_path / "store")
+    grid = xr.Dataset(coords={"lat": [-45., 0., 45.], "lon": [45., 180.]})
+    entry = store.ingest("obs", str(tmp_path / "obs_*.nc"), version="1.0", grid=grid)
+    assert entry["sizes"] == {"time": 360, "lat": 3, "lon": 2}
+    assert set(entry["sources"]) == {str(p) for p in sources}
+
+    ds = store.open("obs")
+    assert ds.tas.chunks is not None
+    anomalies = store.open("obs", anomalies=True).tas
+    years = anomalies.time // 12
+    baseline = anomalies.sel(time=(years >= 1981) & (years <= 2010))
+    climatology = baseline.groupby(baseline.time % 12).mean("time")
+    np.testing.assert_allclose(climatology.fillna(0), 0, atol=1e-10)
+    # interpolation propagates the missing cell into its neighbourhood
+    xr.testing.assert_equal(store.mask("obs").tas, ds.tas.notnull().all("time"))
+    assert 0 < int(store.mask("obs").tas.sum()) < 6
+
+
+def test_daily_baseline(tmp_path):
+    days = np.arange(1979 * 365, 1991 * 365)
+    time = xr.DataArray(days, dims="time", attrs={"units": "days since 0000-01-01",
+                                                   "calendar": "noleap"})
+    tas = 280 + 10 * np.sin(2 * np.pi * days / 365) + np.zeros((3, 4, 1))
+    xr.Dataset({"tas": (("lat", "lon", "time"), tas)},
+               coords={"time": time, "lat": [-45., 0., 45.],
+                       "lon": [0., 90., 180., 270.]}).to_netcdf(tmp_path / "daily.nc")
+    store = ObservationStore(tmp_path / "store")
+    entry = store.ingest("daily", tmp_path / "daily.nc", version="1.0", freq="day",
+                         baseline=(1981, 1990))
+    assert entry["sizes"]["time"] == 12 * 365
+    climatology = store.baseline("daily").tas
+    assert climatology.sizes["month"] == 12 and float(climatology.max() - climatology.min()) > 15
+    np.testing.assert_allclose(store.open("daily", anomalies=True).tas.mean("time"), 0,
+                               atol=1e-10)
+
+
+def test_unchanged_product_is_not_reingested(tmp_path, sources, monkeypatch):
+    store = ObservationStore(tmp_path / "store")
+    store.ingest("obs", sources, version="1.0", baseline=(1990, 1999))
+    assert not store.mask("obs").tas.isel(lat=0, lon=0)
+    monkeypatch.setattr(observations, "open_harmonised", lambda *a, **k: 1 / 0)
+    store.ingest("obs", sources, version="1.0", baseline=(1990, 1999))
+
+    xr.Dataset({"tas": ("x", [1.])}).to_netcdf(sources[0])
+    assert not store.verify("obs")
+    with pytest.raises(ZeroDivisionError):
+        store.ingest("obs", sources, version="1.0", baseline=(1990, 1999))
+
+
+@pytest.mark.parametrize("lon, neighbours", [([-22.5, 157.5], [(315, 0), (135, 180)]),
+                                             ([337.5, 22.5], [(315, 0), (0, 45)])])
+def test_interpolation_across_the_seam(tmp_path, sources, lon, neighbours):
+    store = ObservationStore(tmp_path / "store")
+    grid = xr.Dataset(coords={"lat": [15.], "lon": lon})
+    store.ingest("obs", sources, version="1.0", grid=grid)
+    tas = store.open("obs").tas.isel(time=0, lat=0)
+    source = xr.open_dataset(sources[0], decode_times=False).tas
+    source = source.isel(time=0).sel(lat=15.)
+    expected = [float(source.sel(lon=list(pair)).mean()) for pair in neighbours]
+    np.testing.assert_allclose(tas.values, expected)
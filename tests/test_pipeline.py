@@ -0,0 +1,102 @@
+# %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+# Author: Markus Ritschel
+# eMail:  git@markusritschel.de
+# Date:   2026-10-19
+# %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+#
+import graphlib
+
+import numpy as np
+import pytest
+import xarray as xr
+from typer.testing import CliRunner
+
+from bayes_climsim_eval.cli import app
+from bayes_climsim_eval.core.memoize import DiskCache
+from bayes_climsim_eval.pipeline import Pipeline, Stage
+
+CONFIG = """
+[pipeline]
+name = "demo"
+workers = 2
+
+[stages.load]
+uses = "numpy:arange"
+params = { stop = 6 }
+
+[stages.flip]
+uses = "numpy:flip"
+inputs = { m = "load" }
+
+[stages.cumsum]
+uses = "numpy:cumsum"
+inputs = { a = "load" }
+
+[stages.combine]
+uses = "numpy:outer"
+inputs = { a = "flip", b = "cumsum" }
+"""
+
+
+@pytest.fixture
+def pipeline(tmp_path):
+    config = tmp_path / "pipeline.toml"
+    config.write_text(CONFIG)
+    return Pipeline.from_toml(config, cache=DiskCache(tmp_path / "cache"))
+
+
+def test_run_and_skip_cached(pipeline):
+    assert set(pipeline.plan().values()) == {"run"}
+    result = pipeline.run()
+    np.testing.assert_array_equal(result["combine"],
+                                  np.outer(np.arange(6)[::-1], np.cumsum(range(6))))
+    assert set(pipeline.plan().values()) == {"cached"}
+    assert pipeline.plan(force=["flip"]) == {
+        "load": "cached", "flip": "run", "cumsum": "cached", "combine": "run"}
+
+
+def test_subgraph(pipeline):
+    result = pipeline.run(targets=["flip"])
+    assert list(result) == ["flip"]
+    assert pipeline.plan()["combine"] == "run"
+    assert pipeline.plan()["cumsum"] == "run"
+
+
+def test_cycle_is_rejected():
+    with pytest.raises(graphlib.CycleError):
+        Pipeline([Stage("a", "numpy:abs", inputs={"x": "b"}),
+                  Stage("b", "numpy:abs", inputs={"x": "a"})],
+                 cache=DiskCache("unused"))
+
+
+def test_cli_dry_run(tmp_path):
+    config = tmp_path / "pipeline.toml"
+    config.write_text(CONFIG)
+    result = CliRunner().invoke(app, ["run", str(config), "--dry-run", "-t", "flip"])
+    assert result.exit_code == 0
+    assert "flip" in result.output and "combine" not in result.output
+
+
+def lazy_field(n):
+    field = xr.DataArray(np.arange(n, dtype=float), dims="x", name="field")
+    return field.chunk({"x": 4})
+
+
+def test_lazy_outputs_stay_lazy(tmp_path):
+    cache = DiskCache(tmp_path / "cache", max_size=1000)
+    pipeline = Pipeline([Stage("field", "test_pipeline:lazy_field", params={"n": 10}),
+                         Stage("total", "numpy:sum", inputs={"a": "field"})],
+                        cache=cache)
+    result = pipeline.run(targets=["field", "total"])
+    key = pipeline.keys()["field"]
+    assert (cache.directory / f"{key}.zarr").is_dir()
+    assert result["field"].chunks is not None and result["field"].name == "field"
+    assert float(result["total"]) == 45
+    assert set(pipeline.plan().values()) == {"cached"}
+
+
+def test_oversized_pickle_raises(tmp_path):
+    cache = DiskCache(tmp_path / "cache", max_size=100)
+    with pytest.raises(ValueError, match="exceeds the maximum cache size"):
+        cache.set("big", np.zeros(1000))
+    assert "big" not in cache
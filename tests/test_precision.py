@@ -0,0 +1,90 @@
+# %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+# Author: Markus Ritschel
+# eMail:  git@markusritschel.de
+# Date:   2026-10-19
+# %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+#
+import numpy as np
+import pytest
+import xarray as xr
+
+import bayes_climsim_eval.precision as precision
+from bayes_climsim_eval.distances import pairwise_distances
+from bayes_climsim_eval.precision import apply_precision, precision_impact, promote
+from bayes_climsim_eval.streaming import RunningMoments
+
+
+@pytest.fixture
+def ensemble():
+    rng = np.random.default_rng(11)
+    field = 280 + 5 * rng.normal(size=(6, 24, 5, 6))
+    field[:, :, 0, 0] = np.nan
+    field = xr.DataArray(field, dims=("model", "time", "lat", "lon"),
+                         coords={"model": list("abcdef")})
+    obs = field.mean("model") + rng.normal(size=(24, 5, 6))
+    return field, obs
+
+
+@pytest.mark.parametrize("precision", ["float32", "int16"])
+def test_kernels_accept_reduced_precision(ensemble, precision):
+    field, _ = ensemble
+    reduced = apply_precision(field.chunk(time=8), precision)
+    assert reduced.dtype == np.dtype(precision)
+    np.testing.assert_allclose(pairwise_distances(reduced), pairwise_distances(field),
+                               rtol=1e-3)
+    moments = RunningMoments().update(reduced.isel(model=0))
+    np.testing.assert_allclose(moments.mean, field.isel(model=0).mean("time"),
+                               rtol=1e-5)
+
+
+def test_dataset_and_missing_values(ensemble):
+    field, _ = ensemble
+    ds = apply_precision(field.to_dataset(name="tas"), "int16")
+    assert ds.tas.dtype == np.int16
+    assert promote(ds.tas).isel(lat=0, lon=0).isnull().all()
+
+
+@pytest.mark.parametrize("precision", ["float32", "int16"])
+def test_precision_impact(ensemble, precision):
+    field, obs = ensemble
+    impact = precision_impact(field, obs, sigma_d=3., sigma_s=3.,
+                              precision=precision)
+    assert impact.max_abs_difference < 1e-3
+    assert impact.rank_changes == 0
+    assert impact.memory_ratio == (0.5 if precision == "float32" else 0.25)
+
+
+def test_relative_difference_of_vanishing_weights(ensemble, monkeypatch):
+    field, obs = ensemble
+    weights = iter([[0.5, 0.5, 0.0, 0.0, 0.0, 0.0], [0.5, 0.5, 1e-20, 0.0, 0.0, 0.0]])
+    monkeypatch.setattr("bayes_climsim_eval.weighting.climwip_weights",
+                        lambda *args, dim: xr.DataArray(next(weights), dims=dim))
+    impact = precision_impact(field, obs, sigma_d=3., sigma_s=3.)
+    np.testing.assert_allclose(impact.max_rel_difference, 1e-20 / 5e-4)
+
+
+def test_int16_ranges_are_computed_once(ensemble, tmp_path, monkeypatch):
+    compute = precision.dask.compute
+    field, obs = ensemble
+    ds = xr.Dataset({"tas": field, "obs": obs}).chunk(time=8)
+    calls = []
+    monkeypatch.setattr(precision.dask, "compute",
+                        lambda *a, **k: calls.append(a) or compute(*a, **k))
+    packed = apply_precision(ds, "int16")
+    assert len(calls) == 1
+    np.testing.assert_allclose(promote(packed.obs), obs,
+                               atol=packed.obs.scale_factor)
+
+    calls.clear()
+    ranged = apply_precision(ds, "int16",
+                             valid_range={"tas": (250, 310), "obs": (250, 310)})
+    assert not calls and ranged.tas.scale_factor == 60 / (2 * 32767)
+
+    encoding = {"dtype": "int16", "scale_factor": 0.01, "add_offset": 280.,
+                "_FillValue": -32768}
+    ds.to_netcdf(tmp_path / "packed.nc",
+                 encoding={name: encoding for name in ds.data_vars})
+    calls.clear()
+    packed = xr.open_dataset(tmp_path / "packed.nc", chunks={})
+    repacked = apply_precision(packed, "int16")
+    assert not calls and repacked.tas.scale_factor == 0.01
@@ -0,0 +1,58 @@
+# %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+# Author: Markus Ritschel
+# eMail:  git@markusritschel.de
+# Date:   2026-10-19
+# %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+#
+import numpy as np
+import pytest
+import xarray as xr
+
+from bayes_climsim_eval.projection import projection_statistics, weighted_quantile
+
+
+@pytest.fixture
+def projections():
+    rng = np.random.default_rng(7)
+    da = xr.DataArray(rng.normal(size=(30, 40, 3, 4)),
+                      dims=("model", "year", "lat", "lon"),
+                      coords={"lat": [-30, 0, 30]})
+    weights = xr.DataArray(rng.uniform(size=30), dims="model")
+    return da.chunk(model=10, lat=1), weights
+
+
+def test_statistics_are_lazy(projections):
+    da, weights = projections
+    stats = projection_statistics(da, weights)
+    assert all(var.chunks is not None for var in stats.data_vars.values())
+    expected = (da * weights).sum("model") / weights.sum()
+    np.testing.assert_allclose(stats["mean"], expected)
+
+
+def _inverse_cdf(x, w, q):
+    """Return the smallest value whose cumulative weight reaches the fraction `q`."""
+    order = np.argsort(x)
+    cdf = np.cumsum(w[order])
+    return x[order][np.searchsorted(cdf, q * cdf[-1])]
+
+
+def test_histogram_quantiles_within_bin_width(projections):
+    da, weights = projections
+    q = [0.1, 0.5, 0.9]
+    approx = weighted_quantile(da, weights, q, dim=["model", "year"],
+                               method="histogram", bins=500)
+    exact = weighted_quantile(da, weights, q, dim=["model", "year"]).compute()
+    assert approx.dims == exact.dims
+    assert approx.chunks is not None
+    samples = da.stack(sample=["model", "year"]).transpose(..., "sample").values
+    w = weights.broadcast_like(da.year).stack(sample=["model", "year"]).values
+    inverse_cdf = np.stack([np.apply_along_axis(_inverse_cdf, -1, samples, w, p)
+                            for p in q])
+    np.testing.assert_allclose(approx, inverse_cdf, rtol=0,
+                               atol=approx.attrs["max_abs_error"])
+
+
+def test_scalar_quantile(projections):
+    da, weights = projections
+    median = weighted_quantile(da.isel(year=0), weights, 0.5)
+    assert median.dims == ("lat", "lon")
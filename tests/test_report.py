@@ -0,0 +1,118 @@
+# %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+# Author: Markus Ritschel
+# eMail:  git@markusritschel.de
+# Date:   2026-10-19
+# %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+#
+from dataclasses import asdict
+
+import dask.array
+import matplotlib.pyplot as plt
+import pytest
+import xarray as xr
+from typer.testing import CliRunner
+
+from bayes_climsim_eval.cli import app
+from bayes_climsim_eval.core.cluster import compute_cluster
+from bayes_climsim_eval.core.memoize import DiskCache
+from bayes_climsim_eval.pipeline import Pipeline
+from bayes_climsim_eval.report import Report, _render
+
+PIPELINE = """
+[stages.load]
+uses = "numpy:arange"
+params = { stop = 6 }
+
+[stages.cumsum]
+uses = "numpy:cumsum"
+inputs = { a = "load" }
+"""
+
+REPORT = """
+[report]
+pipeline = "pipeline.toml"
+workers = 2
+
+[figures.line]
+uses = "test_report:plot_line"
+inputs = { y = "load" }
+style = "white_paper"
+filename = "line.png"
+
+[figures.cumulative]
+uses = "test_report:plot_line"
+inputs = { y = "cumsum" }
+params = { title = "cumulative" }
+filename = "sub/cumulative.png"
+"""
+
+
+def plot_line(y, title=""):
+    fig, ax = plt.subplots()
+    ax.plot(y)
+    ax.set_title(title)
+    return fig
+
+
+def lazy_series(n):
+    return xr.DataArray(dask.array.arange(n, chunks=3), dims="time", name="series")
+
+
+@pytest.fixture
+def config(tmp_path):
+    (tmp_path / "pipeline.toml").write_text(PIPELINE)
+    (tmp_path / "report.toml").write_text(REPORT)
+    return tmp_path / "report.toml"
+
+
+def make_report(config, params=None):
+    pipeline = Pipeline.from_toml(config.parent / "pipeline.toml",
+                                  cache=DiskCache(config.parent / "cache"))
+    if params:
+        pipeline.stages["load"].params = params
+    return Report.from_toml(config, pipeline=pipeline,
+                            plot_dir=config.parent / "figures")
+
+
+def test_only_stale_figures_are_rendered(config):
+    report = make_report(config)
+    assert report.build() == {"line": "render", "cumulative": "render"}
+    assert (config.parent / "figures" / "sub" / "cumulative.png").exists()
+    assert set(make_report(config).plan().values()) == {"current"}
+    assert make_report(config, {"stop": 7}).plan() == {"line": "render",
+                                                       "cumulative": "render"}
+    (config.parent / "figures" / "line.png").unlink()
+    assert make_report(config).plan() == {"line": "render", "cumulative": "current"}
+    assert make_report(config).plan(force=True)["cumulative"] == "render"
+
+
+def test_cli_dry_run(config):
+    result = CliRunner().invoke(app, ["report", str(config), "--dry-run",
+                                      "--figure", "line"])
+    assert result.exit_code == 0, result.output
+    assert "line.png" in result.output and "cumulative" not in result.output
+
+
+def test_missing_input_names_stage(config):
+    report = make_report(config)
+    spec = asdict(report.figures["line"])
+    with pytest.raises(KeyError, match="stage 'load'"):
+        _render(spec, str(report.pipeline.cache.directory), {"y": ("load", "missing")},
+                str(config.parent / "line.png"))
+
+
+def test_lazy_inputs_are_rendered_while_a_cluster_is_running(config, tmp_path):
+    (tmp_path / "pipeline.toml").write_text('[stages.lazy]\n'
+                                            'uses = "test_report:lazy_series"\n'
+                                            'params = { n = 6 }\n')
+    (tmp_path / "report.toml").write_text('[figures.lazy]\n'
+                                          'uses = "test_report:plot_line"\n'
+                                          'inputs = { y = "lazy" }\n'
+                                          'filename = "lazy.png"\n')
+    report = make_report(config)
+    with compute_cluster(n_workers=1, adaptive=False, processes=False,
+                         spill_dir=tmp_path / "spill", dashboard_address=":0"):
+        report.pipeline.run()
+        assert report.build() == {"lazy": "render"}
+    assert (tmp_path / "cache" / f"{report.pipeline.keys()['lazy']}.zarr").exists()
+    assert (tmp_path / "figures" / "lazy.png").exists()
@@ -0,0 +1,69 @@
+# %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+# Author: Markus Ritschel
+# eMail:  git@markusritschel.de
+# Date:   2026-10-19
+# %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+#
+import numpy as np
+import psutil
+from typer.testing import CliRunner
+
+from bayes_climsim_eval.cli import app
+from bayes_climsim_eval.scaling import (
+    evaluate,
+    save_scaling_report,
+    scaling_study,
+    synthetic_files,
+)
+
+
+def test_synthetic_workload(tmp_path):
+    models, obs = synthetic_files(tmp_path, 4, 30.0, n_time=24)
+    assert synthetic_files(tmp_path, 2, 30.0, n_time=24)[0] == models[:2]
+    weights = evaluate(models, obs, time_chunk=12)
+    assert weights.sizes["model"] == 4
+    np.testing.assert_allclose(weights.sum(), 1)
+
+
+def test_scaling_study(tmp_path):
+    results = scaling_study(models=(2, 3), resolutions=(30.0,), workers=(1, 2),
+                            n_time=24, directory=tmp_path)
+    sizes = results.groupby("kind").size().to_dict()
+    assert sizes == {"size": 2, "strong": 2, "weak": 2}
+    assert results[results.kind == "weak"].n_models.tolist() == [2, 4]
+    assert (results.efficiency.dropna() > 0).all()
+    assert results.loc[results.kind != "size"].efficiency.iloc[0] == 1
+    assert (results.peak_memory_mb > 0).all() and (results.input_mb > 0).all()
+    if hasattr(psutil.Process, "io_counters"):
+        assert (results.io_mb > 0).all()
+    paths = save_scaling_report(results, tmp_path / "report")
+    assert paths["table"].exists() and paths["figure"].exists()
+
+
+def test_cli(tmp_path):
+    result = CliRunner().invoke(app, ["--no-cluster", "scaling", "--models", "2",
+                                      "--resolutions", "45", "--workers", "1",
+                                      "--n-time", "12", "--output-dir", str(tmp_path)])
+    assert result.exit_code == 0, result.output
+    assert "strong" in result.output
+    assert list(tmp_path.glob("scaling_*.png"))
+
+
+def test_cli_uses_global_options(tmp_path, monkeypatch):
+    calls = []
+
+    def study(models, resolutions, workers, **kwargs):
+        calls.append((workers, kwargs))
+        return scaling_study(models, resolutions, workers, n_time=12,
+                             directory=tmp_path)
+
+    monkeypatch.setattr("bayes_climsim_eval.scaling.scaling_study", study)
+    args = ["scaling", "--models", "2", "--resolutions", "45", "--workers", "1",
+            "--workers", "4", "--output-dir", str(tmp_path)]
+    assert CliRunner().invoke(app, args).exit_code == 0
+    assert calls[-1][1]["cluster"] is False
+    assert CliRunner().invoke(app, ["--cluster", "--n-workers", "2", "--memory-limit",
+                                    "1GB", *args]).exit_code == 0
+    workers, kwargs = calls[-1]
+    assert workers == [1] and kwargs["cluster"] is True
+    assert kwargs["memory_limit"] == "1GB"
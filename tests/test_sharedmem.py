@@ -0,0 +1,52 @@
+# %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+# Author: Markus Ritschel
+# eMail:  git@markusritschel.de
+# Date:   2026-10-19
+# %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+#
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pytest
+import xarray as xr
+
+from bayes_climsim_eval.core.sharedmem import (
+    SharedDataset,
+    attach_dataset,
+    init_worker,
+    shared_dataset,
+)
+
+
+@pytest.fixture
+def observations():
+    rng = np.random.default_rng(1)
+    return xr.Dataset(
+        {"tas": (("time", "lat", "lon"),
+                 rng.normal(size=(12, 4, 8)).astype(np.float32)),
+         "cell_area": (("lat", "lon"), rng.uniform(size=(4, 8))),
+         "land": (("lat", "lon"), rng.uniform(size=(4, 8)) > 0.5)},
+        coords={"lat": np.linspace(-45, 45, 4), "lon": np.arange(0, 360, 45)},
+        attrs={"source": "test"})
+
+
+def _worker_sum(_):
+    obs = shared_dataset()
+    return float(obs.tas.weighted(obs.cell_area).sum())
+
+
+@pytest.mark.parametrize("backend", ["shm", "memmap"])
+def test_attach_dataset(observations, backend):
+    with SharedDataset(observations.chunk(time=5), backend=backend) as shared:
+        attached = attach_dataset(shared.handle)
+        xr.testing.assert_identical(attached, observations)
+        assert not attached.tas.values.flags.writeable
+
+
+def test_workers_attach(observations):
+    expected = float(observations.tas.weighted(observations.cell_area).sum())
+    with SharedDataset(observations) as shared:
+        with ProcessPoolExecutor(2, initializer=init_worker,
+                                 initargs=(shared.handle,)) as pool:
+            results = list(pool.map(_worker_sum, range(4)))
+    np.testing.assert_allclose(results, expected, rtol=1e-6)
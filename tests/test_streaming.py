@@ -0,0 +1,78 @@
+# %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+# Author: Markus Ritschel
+# eMail:  git@markusritschel.de
+# Date:   2026-10-19
+# %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+#
+import functools
+
+import numpy as np
+import pytest
+import xarray as xr
+
+from bayes_climsim_eval.streaming import (
+    InterannualVariance,
+    OnlineTrend,
+    RunningMoments,
+    iter_time_chunks,
+    stream_statistics,
+)
+
+
+@pytest.fixture
+def series():
+    rng = np.random.default_rng(3)
+    nt = 12 * 30
+    time = xr.DataArray(np.arange(nt) * 30 + 15, dims="time",
+                        attrs={"units": "days since 1850-01-01", "calendar": "360_day"})
+    data = 1e4 + 0.02 * np.arange(nt)[:, None] / 12 + rng.normal(size=(nt, 4))
+    data[5, 1] = np.nan
+    return xr.DataArray(data, dims=("time", "cell"), coords={"time": time})
+
+
+def test_moments_merge_matches_numpy(series):
+    parts = [RunningMoments().update(chunk) for chunk in iter_time_chunks(series, 50)]
+    total = functools.reduce(RunningMoments.merge, parts)
+    np.testing.assert_allclose(total.mean, series.mean("time"))
+    np.testing.assert_allclose(total.variance(), series.var("time", ddof=1), rtol=1e-10)
+    assert total.count.values.tolist() == [360, 359, 360, 360]
+
+
+def test_trend_matches_polyfit(series):
+    trend = OnlineTrend()
+    for chunk in iter_time_chunks(series, 37):
+        trend.update(chunk)
+    years = 1850 + (np.arange(series.sizes["time"]) + 0.5) / 12
+    expected = np.polyfit(years, series.values[:, 0], 1)
+    assert trend.slope.values[0] == pytest.approx(expected[0])
+    assert trend.intercept.values[0] == pytest.approx(expected[1])
+
+
+def test_interannual_variance_across_workers(series):
+    first, second = InterannualVariance(), InterannualVariance()
+    for chunk in iter_time_chunks(series.isel(time=slice(0, 120)), 7):
+        first.update(chunk)
+    for chunk in iter_time_chunks(series.isel(time=slice(120, None)), 11):
+        second.update(chunk)
+    annual = series.coarsen(time=12).mean()
+    np.testing.assert_allclose(first.merge(second).variance(),
+                               annual.var("time", ddof=1))
+
+
+def test_stream_statistics(series):
+    stats = stream_statistics(iter_time_chunks(series.chunk(time=60), 60))
+    assert stats.climatology.sizes["month"] == 12
+    np.testing.assert_allclose(stats.climatology.sel(month=1),
+                               series.isel(time=slice(0, None, 12)).mean("time"))
+
+
+def test_stream_statistics_of_dataset(series):
+    ds = xr.Dataset({"tas": series, "pr": 2 * series, "area": ("cell", np.ones(4))})
+    stats = stream_statistics(iter_time_chunks(ds, 60))
+    names = ("climatology", "mean", "variance", "trend", "trend_stderr",
+             "interannual_variance")
+    assert set(stats.data_vars) == {f"{var}_{stat}" for var in ("tas", "pr")
+                                    for stat in names}
+    expected = stream_statistics(iter_time_chunks(series, 60))
+    xr.testing.assert_allclose(stats.tas_trend, expected.trend)
+    xr.testing.assert_allclose(stats.pr_mean, 2 * expected["mean"])
@@ -0,0 +1,71 @@
+# %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+# Author: Markus Ritschel
+# eMail:  git@markusritschel.de
+# Date:   2026-10-19
+# %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+#
+import numpy as np
+import pandas as pd
+import pytest
+import xarray as xr
+
+from bayes_climsim_eval.timeaxis import align_time, harmonise_time, time_index
+
+
+def raw_time(values, units, calendar):
+    return xr.DataArray(np.asarray(values), dims="time",
+                        attrs={"units": units, "calendar": calendar})
+
+
+def test_gregorian_matches_pandas():
+    dates = pd.date_range("1899-12-31 12:00", periods=2000, freq="13h")
+    hours = (dates - pd.Timestamp("1850-01-01")) / pd.Timedelta("1h")
+    time = raw_time(hours, "hours since 1850-01-01 00:00:00", "standard")
+    np.testing.assert_array_equal(time_index(time), dates.year * 12 + dates.month - 1)
+    expected = (dates.normalize() - pd.Timestamp("1970-01-01")).days + 719162
+    np.testing.assert_array_equal(time_index(time, freq="day"), expected)
+
+
+@pytest.mark.parametrize("calendar,length", [("noleap", 365), ("360_day", 360),
+                                             ("all_leap", 366)])
+def test_fixed_length_calendars(calendar, length):
+    time = raw_time(np.arange(0, 10 * length, 15) + 0.5, "days since 2000-01-01",
+                    calendar)
+    index = time_index(time).values
+    assert index[0] == 2000 * 12
+    assert index[-1] == 2009 * 12 + 11
+    assert np.all(np.diff(index) >= 0)
+    assert len(np.unique(index)) == 120
+
+
+def test_harmonise_daily_to_monthly_lazily():
+    time = raw_time(np.arange(365 * 2), "days since 1850-01-01", "noleap")
+    da = xr.DataArray(np.arange(365 * 2.), dims="time", coords={"time": time})
+    da = da.chunk(time=100)
+    monthly = harmonise_time(da)
+    assert monthly.chunks is not None
+    assert monthly.sizes["time"] == 24
+    assert monthly.isel(time=0).compute().item() == 15.0
+    assert monthly.time.attrs["units"] == "months since 0000-01"
+
+
+def series(values, units, calendar):
+    time = raw_time(values, units, calendar)
+    return xr.DataArray(np.ones(time.size), dims="time", coords={"time": time})
+
+
+def test_align_mixed_calendars():
+    model = series(np.arange(24) * 30 + 15, "days since 2000-01-01", "360_day")
+    obs_days = (pd.date_range("2001-01-01", periods=12, freq="MS")
+                - pd.Timestamp("2000-01-01"))
+    obs = series(obs_days.days + 14, "days since 2000-01-01", "standard")
+    model, obs = align_time(model, obs)
+    assert model.sizes["time"] == obs.sizes["time"] == 12
+    assert model.time.values[0] == 2001 * 12
+
+
+def test_align_daily_requires_same_calendar():
+    noleap = series([0, 1, 2], "days since 2000-01-01", "noleap")
+    standard = series([0, 1, 2], "days since 2000-01-01", "standard")
+    with pytest.raises(ValueError, match="calendars"):
+        align_time(noleap, standard, freq="day")
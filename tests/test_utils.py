@@ -0,0 +1,77 @@
+# %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+# Author: Markus Ritschel
+# eMail:  git@markusritschel.de
+# Date:   2026-10-19
+# %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+#
+from concurrent.futures import ThreadPoolExecutor
+
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+import pytest
+import xarray as xr
+
+from bayes_climsim_eval import load, save
+
+
+def test_save_is_content_addressed(tmp_path):
+    df = pd.DataFrame({"a": [1, 2, 3]})
+    path = save(df, tmp_path / "table.csv", index=False)
+    assert path.name.startswith("table_") and path.exists()
+    mtime = path.stat().st_mtime_ns
+    assert save(df.copy(), tmp_path / "table.csv", index=False) == path
+    assert path.stat().st_mtime_ns == mtime
+    assert save(df + 1, tmp_path / "table.csv", index=False) != path
+    assert save(df, tmp_path / "table.csv") != path
+    pd.testing.assert_frame_equal(load(path), df)
+    pd.testing.assert_frame_equal(load(tmp_path / "table.csv", df, index=False), df)
+
+
+def test_unsupported_type_is_not_hashed(tmp_path, monkeypatch):
+    monkeypatch.setattr("bayes_climsim_eval.core.utils.artefact_hash",
+                        lambda *a, **k: 1 / 0)
+    with pytest.raises(NotImplementedError):
+        save(object(), tmp_path / "object.csv")
+
+
+def test_figure_is_drawn_once(tmp_path, monkeypatch):
+    fig, ax = plt.subplots()
+    ax.plot([1, 3, 2])
+    draws = []
+    draw = plt.Figure.draw
+    monkeypatch.setattr(plt.Figure, "draw",
+                        lambda self, renderer: draws.append(1) or draw(self, renderer))
+    path = save(fig, tmp_path / "line.png", dpi=50)
+    assert len(draws) == 1
+    assert save(fig, tmp_path / "line.png", dpi=50) == path
+    assert [p.name for p in tmp_path.glob("*.png")] == [path.name]
+    assert load(tmp_path / "line.png", fig, dpi=50).shape[:2] == (240, 320)
+    plt.close(fig)
+
+
+def test_lazy_dataset_is_not_recomputed(tmp_path, monkeypatch):
+    ds = xr.Dataset({"tas": ("x", np.arange(4.))}).chunk(x=2) * 2
+    path = save(ds, tmp_path / "stats.nc")
+    monkeypatch.setattr(xr.Dataset, "to_netcdf", lambda *a, **k: 1 / 0)
+    assert save(ds, tmp_path / "stats.nc") == path
+    xr.testing.assert_identical(load(tmp_path / "stats.nc", ds).load(), ds.compute())
+    assert load(tmp_path / "stats.nc", ds + 1) is None
+    assert load(tmp_path / "stats.nc", ds, complevel=4) is None
+
+
+def test_lock_files_are_kept_apart(tmp_path):
+    ds = xr.Dataset({"tas": ("x", np.arange(4.))})
+    save(ds, tmp_path / "a.nc")
+    save(ds, tmp_path / "b.nc")
+    others = [p.name for p in tmp_path.iterdir() if not p.name.endswith(".nc")]
+    assert others == [".locks"]
+
+
+def test_concurrent_writers(tmp_path):
+    ds = xr.Dataset({"tas": ("x", np.arange(1000.))})
+    with ThreadPoolExecutor(4) as pool:
+        paths = set(pool.map(lambda _: save(ds, tmp_path / "stats.nc"), range(8)))
+    assert len(paths) == 1
+    files = [p.name for p in tmp_path.iterdir() if p.suffix == ".nc"]
+    assert files == [paths.pop().name]